@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The site's modules live in src/ as top-level modules, put on the path here
+# once for every benchmark. Run them from the repository root as modules:
+# python3 -m bench, python3 -m bench.bench_blocks and so on.
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
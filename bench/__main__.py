@@ -0,0 +1,143 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+from bench import corpus
+from block_markdown import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from copystatic import copy_static_to_public
+from inline_markdown import text_to_text_nodes
+
+def best_of(func, repeat):
+    # Seconds per call: the best of `repeat` timed batches, each at least ~50ms
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, number // 4)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def markdown_stages(kind, size, repeat):
+    markdown = corpus.generate(kind, size)
+    blocks = markdown_to_blocks(markdown)
+    texts = [" ".join(block.split("\n")) for block in blocks if not block.startswith("```")]
+    node = markdown_to_html_node(markdown)
+
+    def inline():
+        for text in texts:
+            text_to_text_nodes(text)
+
+    def classify():
+        for block in blocks:
+            block_to_block_type(block)
+
+    return {
+        "text_to_text_nodes": best_of(inline, repeat),
+        "markdown_to_blocks": best_of(lambda: markdown_to_blocks(markdown), repeat),
+        "block_to_block_type": best_of(classify, repeat),
+        "markdown_to_html_node": best_of(lambda: markdown_to_html_node(markdown), repeat),
+        "to_html": best_of(node.to_html, repeat),
+    }
+
+def make_static_tree(root, files):
+    for i in range(files):
+        dir_path = os.path.join(root, f"dir{i % 10}")
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, f"file{i}.bin"), "wb") as f:
+            f.write(os.urandom(16 * 1024))
+
+def copy_stages(files, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "static")
+        dst = os.path.join(tmp, "public")
+        manifest = os.path.join(tmp, "manifest.json")
+        make_static_tree(src, files)
+
+        def full():
+            copy_static_to_public(src, dst, incremental=False, manifest_path=manifest)
+
+        def incremental():
+            copy_static_to_public(src, dst, manifest_path=manifest)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["copy_static_to_public/full"] = min(timeit.repeat(full, number=1, repeat=repeat))
+            results["copy_static_to_public/incremental"] = min(timeit.repeat(incremental, number=1, repeat=repeat))
+        shutil.rmtree(dst)
+    return results
+
+def run(args):
+    results = {}
+    for kind in args.kinds:
+        for size in args.sizes:
+            for stage, seconds in markdown_stages(kind, size, args.repeat).items():
+                name = f"{stage}/{kind}/{size}"
+                results[name] = seconds
+                print(f"{name:<45} {seconds * 1000:10.3f} ms")
+    if args.copy_files:
+        for name, seconds in copy_stages(args.copy_files, args.repeat).items():
+            results[name] = seconds
+            print(f"{name:<45} {seconds * 1000:10.3f} ms")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Wrote {args.output}")
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    for name in sorted(baseline.keys() & current.keys()):
+        ratio = current[name] / baseline[name]
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "faster"
+        print(f"{name:<45} {baseline[name] * 1000:10.3f} {current[name] * 1000:10.3f} ms {ratio:6.2f}x {flag}")
+
+    if regressions:
+        print(f"{regressions} regressions over {args.threshold:.0%}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m bench", description="Benchmark the markdown to HTML pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time every stage and optionally save the results as JSON")
+    run_parser.add_argument("-o", "--output", help="write results to this JSON file")
+    run_parser.add_argument("--kinds", nargs="+", choices=corpus.KINDS, default=list(corpus.KINDS))
+    run_parser.add_argument("--sizes", nargs="+", choices=list(corpus.SIZES), default=["small", "medium"])
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--copy-files", type=int, default=500, help="static files to copy (0 to skip)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="flag stages that got slower than a saved baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown (default 0.1 = 10%%)")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import timeit
+
+from bench import corpus
+from block_markdown import (
+    BlockType,
+    block_to_block_type,
+    block_to_html_node,
+    handle_code,
+    handle_heading,
+    handle_ordered_list,
+    handle_paragraph,
+    handle_quote,
+    handle_unordered_list,
+    markdown_to_blocks,
+)
+
+HANDLERS = {
+    BlockType.PARAGRAPH: handle_paragraph,
+    BlockType.HEADING: handle_heading,
+    BlockType.CODE: handle_code,
+    BlockType.QUOTE: handle_quote,
+    BlockType.UNORDERED_LIST: handle_unordered_list,
+    BlockType.ORDERED_LIST: handle_ordered_list,
+}
+
+def two_pass(block):
+    # classify, then let the handler split and check the lines again
+    return HANDLERS[block_to_block_type(block)](block)
+
+def run(label, func, blocks):
+    seconds = min(timeit.repeat(lambda: [func(block) for block in blocks], number=10, repeat=5)) / 10
+    print(f"{label:<10} {seconds * 1000:8.3f} ms")
+    return seconds
+
+def plain_lists(count):
+    # long lists of unformatted items, so the block-level work isn't hidden
+    # behind inline parsing
+    blocks = []
+    for i in range(count):
+        lines = [f"{n}. item {n}" if i % 2 else f"- item {n}" for n in range(1, 31)]
+        blocks.append("\n".join(lines))
+    return blocks
+
+def main():
+    cases = [("plain lists", plain_lists(200))]
+    for kind in ("list", "quote", "mixed"):
+        cases.append((kind, markdown_to_blocks(corpus.generate(kind, "medium"))))
+    for kind, blocks in cases:
+        print(f"{kind}: {len(blocks)} blocks")
+        before = run("two-pass", two_pass, blocks)
+        after = run("fused", block_to_html_node, blocks)
+        print(f"speedup    {before / after:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import html
+import timeit
+
+from bench import corpus
+from block_markdown import markdown_to_html_node
+from htmlnode import HTMLNode, LeafNode
+
+# LeafNode.to_html and props_to_html as they were before escaping, and the
+# same with a plain html.escape on every value, to compare against
+
+def unescaped_props(self):
+    if not self.props:
+        return ""
+    return "".join(f' {key}="{value}"' for key, value in self.props.items())
+
+def unescaped_leaf(self):
+    if self.value is None:
+        raise ValueError("LeafNode must have a value")
+    if self.tag is None:
+        return self.value
+    return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+def naive_props(self):
+    if not self.props:
+        return ""
+    return "".join(f' {key}="{html.escape(value)}"' for key, value in self.props.items())
+
+def naive_leaf(self):
+    if self.value is None:
+        raise ValueError("LeafNode must have a value")
+    if self.tag is None:
+        return html.escape(self.value, quote=False)
+    return f"<{self.tag}{self.props_to_html()}>{html.escape(self.value, quote=False)}</{self.tag}>"
+
+VARIANTS = (
+    ("unescaped", unescaped_leaf, unescaped_props),
+    ("html.escape", naive_leaf, naive_props),
+    ("fast path", LeafNode.to_html, HTMLNode.props_to_html),
+)
+
+def use(variant):
+    _, LeafNode.to_html, HTMLNode.props_to_html = variant
+
+def main(rounds=15):
+    original = VARIANTS[-1]
+    try:
+        for kind in corpus.KINDS:
+            markdown = corpus.generate(kind, "medium")
+            node = markdown_to_html_node(markdown)
+            stages = (("to_html", node.to_html), ("render", lambda: markdown_to_html_node(markdown).to_html()))
+            for stage, func in stages:
+                # the variants take turns, so drift in the machine's speed
+                # hits them all alike
+                best = {}
+                for _ in range(rounds):
+                    for variant in VARIANTS:
+                        use(variant)
+                        seconds = timeit.timeit(func, number=5) / 5
+                        best[variant[0]] = min(best.get(variant[0], seconds), seconds)
+                print(f"{stage}/{kind}:")
+                baseline = best["unescaped"]
+                for label, seconds in best.items():
+                    print(f"  {label:<12} {seconds * 1000:8.3f} ms  {(seconds / baseline - 1) * 100:+6.1f}%")
+    finally:
+        use(original)
+
+if __name__ == "__main__":
+    main()
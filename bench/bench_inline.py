@@ -0,0 +1,36 @@
+import timeit
+
+from inline_markdown import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_text_nodes
+from textnode import TextNode, TextType
+
+SAMPLE = (
+    "This is **bold** text with an _italic_ word, some `inline code`, "
+    "an ![image](https://example.com/a.png) and a [link](https://example.com/page) "
+)
+
+def chained_text_to_text_nodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+def run(label, func, text, number):
+    seconds = min(timeit.repeat(lambda: func(text), number=number, repeat=5))
+    mb_per_second = len(text) * number / seconds / 1_000_000
+    print(f"{label:<10} {seconds * 1000 / number:8.3f} ms/call {mb_per_second:8.2f} MB/s")
+    return seconds
+
+def main():
+    for repeat in (1, 100, 1000):
+        text = SAMPLE * repeat
+        number = max(1, 2000 // repeat)
+        print(f"{len(text)} chars")
+        chained = run("chained", chained_text_to_text_nodes, text, number)
+        single = run("single", text_to_text_nodes, text, number)
+        print(f"speedup    {chained / single:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+from block_markdown import markdown_to_html_node
+from htmlnode import FrozenNode
+
+PAGES = 10_000
+
+def make_page(rng, index):
+    links = " ".join(f"[page {rng.randrange(50)}](/page-{rng.randrange(50)}.html)" for _ in range(5))
+    return "\n\n".join([
+        f"# Page {index}",
+        f"Some **bold** text, some _italic_ text and `code` with {links}.",
+        "- first item\n- second [home](/index.html)\n- third ![logo](/images/logo.png)",
+        "1. one\n2. two\n3. three",
+        "```\nprint('hello')\n```",
+        f"Footer paragraph {index} with a [license](/license.html) link.",
+    ])
+
+def count_nodes(trees):
+    # (references, unique nodes): a shared link or image leaf is referenced
+    # from many trees but allocated once, along with the frozen copy it
+    # wraps, so bytes/node divides by the unique count
+    references = 0
+    seen = set()
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        references += 1
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, FrozenNode):
+            seen.add(id(node.node))
+        if node.children:
+            stack.extend(node.children)
+    return references, len(seen)
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else PAGES
+    rng = random.Random(42)
+    sources = [make_page(rng, i) for i in range(pages)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    trees = [markdown_to_html_node(source) for source in sources]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    references, nodes = count_nodes(trees)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+
+    print(f"pages          {pages}")
+    print(f"node refs      {references}")
+    print(f"unique nodes   {nodes}")
+    print(f"parse time     {elapsed:.2f} s")
+    print(f"retained       {current / 1_000_000:.1f} MB")
+    print(f"bytes/node     {current / nodes:.1f}")
+    print(f"traced peak    {peak / 1_000_000:.1f} MB")
+    print(f"peak RSS       {max_rss / 1_000_000:.1f} MB")
+
+if __name__ == "__main__":
+    main()
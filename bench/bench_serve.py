@@ -0,0 +1,55 @@
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from bench import SRC_DIR, corpus
+from serve import Renderer, make_server
+
+TEMPLATE = os.path.join(SRC_DIR, "..", "template.html")
+# what a preview paid per keystroke before: a fresh interpreter per render
+COLD = "import sys; from block_markdown import markdown_to_html_node; markdown_to_html_node(sys.stdin.read()).to_html()"
+
+def percentiles(times):
+    times = sorted(times)
+    return times[len(times) // 2] * 1000, times[min(len(times) - 1, len(times) * 99 // 100)] * 1000
+
+def cold(markdown, requests):
+    times = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", COLD], input=markdown, text=True, cwd=SRC_DIR, check=True)
+        times.append(time.perf_counter() - start)
+    return percentiles(times)
+
+def warm(markdown, requests):
+    server = make_server(Renderer(TEMPLATE), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    times = []
+    try:
+        for i in range(requests):
+            # a keystroke changes one block; the rest come from the block cache
+            body = f"{markdown}\n\nedit {i}"
+            start = time.perf_counter()
+            connection.request("POST", "/render", body=body.encode())
+            connection.getresponse().read()
+            times.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+        server.shutdown()
+        server.server_close()
+    return percentiles(times)
+
+def main():
+    for size in ("small", "medium"):
+        markdown = corpus.generate("mixed", size)
+        print(f"{size}: {len(markdown)} chars")
+        for label, func, requests in (("cold", cold, 20), ("daemon", warm, 500)):
+            p50, p99 = func(markdown, requests)
+            print(f"{label:<10} p50 {p50:8.3f} ms  p99 {p99:8.3f} ms")
+
+if __name__ == "__main__":
+    main()
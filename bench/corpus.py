@@ -0,0 +1,70 @@
+import random
+
+KINDS = ("inline", "list", "quote", "code", "mixed")
+# approximate number of blocks per document
+SIZES = {"small": 20, "medium": 200, "large": 2000}
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog hobbit ring wizard shire river "
+    "mountain elf dwarf road fire night star tree stone song"
+).split()
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def inline_text(rng, count):
+    parts = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.15:
+            parts.append(f"**{words(rng, 2)}**")
+        elif roll < 0.3:
+            parts.append(f"_{words(rng, 2)}_")
+        elif roll < 0.4:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        elif roll < 0.5:
+            parts.append(f"[{words(rng, 2)}](/{rng.choice(WORDS)}.html)")
+        elif roll < 0.55:
+            parts.append(f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)")
+        else:
+            parts.append(words(rng, 3))
+    return " ".join(parts)
+
+def paragraph(rng):
+    return inline_text(rng, rng.randint(5, 15))
+
+def list_item(rng):
+    return f"{rng.choice(WORDS)} {inline_text(rng, rng.randint(2, 5))}"
+
+def unordered_list(rng):
+    return "\n".join(f"- {list_item(rng)}" for _ in range(rng.randint(3, 12)))
+
+def ordered_list(rng):
+    return "\n".join(f"{i}. {list_item(rng)}" for i in range(1, rng.randint(3, 12) + 1))
+
+def quote(rng):
+    return "\n".join(f"> {inline_text(rng, rng.randint(2, 6))}" for _ in range(rng.randint(2, 6)))
+
+def code(rng):
+    lines = [f"    {words(rng, rng.randint(2, 6))}" for _ in range(rng.randint(3, 15))]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+def heading(rng):
+    return "#" * rng.randint(1, 3) + " " + words(rng, 4)
+
+BLOCK_MAKERS = {
+    "inline": (paragraph,),
+    "list": (unordered_list, ordered_list),
+    "quote": (quote,),
+    "code": (code,),
+    "mixed": (paragraph, paragraph, unordered_list, ordered_list, quote, code, heading),
+}
+
+def generate(kind, size, seed=0):
+    # Same (kind, size, seed) always gives the same document
+    rng = random.Random(f"{kind}-{size}-{seed}")
+    makers = BLOCK_MAKERS[kind]
+    blocks = [f"# {kind} {size}"]
+    for _ in range(SIZES[size]):
+        blocks.append(rng.choice(makers)(rng))
+    return "\n\n".join(blocks)
@@ -1,5 +1,9 @@
+import json
+import os
+from collections import OrderedDict
 from enum import Enum
-from htmlnode import HTMLNode, ParentNode
+from highlight import highlight_code
+from htmlnode import ParentNode, RawNode
 from textnode import TextNode, TextType, text_node_to_html_node
 from inline_markdown import text_to_text_nodes
 
@@ -12,58 +16,93 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
     
 def markdown_to_blocks(markdown):
-    raw_blocks = markdown.split("\n\n")
-    blocks = []
-    for block in raw_blocks:
-        lines = block.split("\n")
-        cleaned_lines = []
-        for line in lines:
-            line = line.strip()
-            if line != "":
-                cleaned_lines.append(line)
-        if cleaned_lines:
-            blocks.append("\n".join(cleaned_lines))
-    return blocks
+    return list(iter_blocks(markdown.split("\n")))
+
+def iter_blocks(lines):
+    # Yields each block as soon as it ends, so `lines` can be a file object
+    # (or iter(mm.readline, b"") for an mmap) and only the current block is
+    # held in memory. An empty line ends a block unless it's inside a ```
+    # fence; whitespace-only lines are dropped without ending the block.
+    block = []
+    in_fence = False
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8").rstrip("\r\n")
+        elif line.endswith("\n"):
+            line = line[:-1]
+        stripped = line.strip()
+
+        if in_fence:
+            block.append(stripped)
+            in_fence = fence_open_after(stripped, in_fence)
+            continue
+        if line == "":
+            if block:
+                yield "\n".join(block)
+                block = []
+            continue
+        if stripped == "":
+            continue
+
+        block.append(stripped)
+        in_fence = fence_open_after(stripped, in_fence)
+
+    if block:
+        yield "\n".join(block)
+
+def fence_open_after(line, in_fence):
+    # Whether a ``` fence is open after the stripped line. As in is_code, a
+    # fence closes on any line ending in ```, not just one starting with it.
+    if in_fence:
+        return not line.endswith("```")
+    return line.startswith("```") and not (len(line) >= 6 and line.endswith("```"))
 
 def block_to_block_type(markdown):
+    if is_heading(markdown):
+        return BlockType.HEADING
+    if is_code(markdown):
+        return BlockType.CODE
+    block_type, _ = classify_lines(markdown.split("\n"))
+    return block_type
 
-    # check for heading
-    if markdown.startswith("#"):
-        parts = markdown.split(" ", 1)
+def is_heading(block):
+    if block.startswith("#"):
+        parts = block.split(" ", 1)
         if len(parts) == 2:
-            hashes, text = parts
-            if 1 <= len(hashes) <= 6 and hashes == "#" * len(hashes):
-                return BlockType.HEADING
+            hashes = parts[0]
+            return 1 <= len(hashes) <= 6 and hashes == "#" * len(hashes)
+    return False
 
-    # check if code        
-    if markdown.startswith("```") and markdown.endswith("```"):
-        return BlockType.CODE
-    
-    # check if quote, ordered_list, or unordered_list
-    lines = markdown.split("\n")
-    is_quote = True
-    is_unordered = True
-    is_ordered = True
+def is_code(block):
+    return block.startswith("```") and block.endswith("```")
 
-    for index, line in enumerate(lines):
-        if not line.startswith(">"):
-            is_quote = False
-        if not line.startswith("- "):
-            is_unordered = False
-        expected_number = index + 1
-        expected_start = f"{expected_number}. "
-        if not line.startswith(expected_start):
-            is_ordered = False
-
-    if is_quote:
-        return BlockType.QUOTE
-    if is_unordered:
-        return BlockType.UNORDERED_LIST
-    if is_ordered:
-        return BlockType.ORDERED_LIST
-    
-    # all else fails
-    return BlockType.PARAGRAPH
+def classify_lines(lines):
+    # Decide between quote, unordered list, ordered list and paragraph in one
+    # scan of the lines, collecting each line's text as we go. The prefixes
+    # are mutually exclusive, so the first line picks the only candidate and
+    # the remaining lines just have to agree with it.
+    first = lines[0]
+    items = []
+    if first.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH, lines
+            items.append(line[1:].strip())
+        return BlockType.QUOTE, items
+    if first.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH, lines
+            items.append(line[2:].strip())
+        return BlockType.UNORDERED_LIST, items
+    if first.startswith("1. "):
+        for number, line in enumerate(lines, 1):
+            prefix = f"{number}. "
+            if not line.startswith(prefix):
+                return BlockType.PARAGRAPH, lines
+            items.append(line[len(prefix):].strip())
+        return BlockType.ORDERED_LIST, items
+    return BlockType.PARAGRAPH, lines
 
 def text_to_children(text):
     text_nodes = text_to_text_nodes(text)
@@ -73,6 +112,12 @@ def text_to_children(text):
         children.append(html_node)
     return children
 
+def list_node(tag, items):
+    li_nodes = []
+    for item in items:
+        li_nodes.append(ParentNode("li", children=text_to_children(item)))
+    return ParentNode(tag, children=li_nodes)
+
 
 def handle_paragraph(block):
     lines = block.split("\n")
@@ -85,12 +130,26 @@ def handle_heading(block):
     return ParentNode(f"h{level}", children=text_to_children(text))
 
 def handle_code(block):
-    if not (block.startswith("```") and block.endswith("```")):
+    if not is_code(block):
         raise ValueError("Invalid code block")
-    code_content = block[3:-3].strip("\n")
-    raw_text_node = TextNode(code_content, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
-    code_node = ParentNode("code", [child])
+    body = block[3:-3]
+    # "```python" on the opening line tags the block with its language
+    info, newline, rest = body.partition("\n")
+    language = None
+    if newline and info.strip():
+        language = info.split()[0]
+        body = rest
+    code_content = body.strip("\n")
+    if language is None:
+        raw_text_node = TextNode(code_content, TextType.TEXT)
+        return ParentNode("pre", [ParentNode("code", [text_node_to_html_node(raw_text_node)])])
+    html = highlight_code(code_content, language)
+    if html is None:
+        child = text_node_to_html_node(TextNode(code_content, TextType.TEXT))
+    else:
+        # already escaped and wrapped in spans
+        child = RawNode(html)
+    code_node = ParentNode("code", [child], {"class": f"language-{language}"})
     return ParentNode("pre", [code_node])
 
 def handle_quote(block):
@@ -102,20 +161,16 @@ def handle_quote(block):
         lines.append(cleaned)
 
     quote_text = " ".join(lines)
-    return HTMLNode("blockquote", children=text_to_children(quote_text))
+    return ParentNode("blockquote", children=text_to_children(quote_text))
 
 def handle_unordered_list(block):
-    lines = block.split("\n")
     items = []
-    for line in lines:
-        cleaned = line.lstrip("*- ").strip()
-        items.append(cleaned)
-    li_nodes = []
-    for item in items:
-        children = text_to_children(item)
-        li_node = ParentNode("li", children=children)
-        li_nodes.append(li_node)
-    return ParentNode("ul", children=li_nodes)
+    for line in block.split("\n"):
+        # strip the marker only, so "- **bold**" keeps its delimiters
+        if line.startswith(("- ", "* ")):
+            line = line[2:]
+        items.append(line.strip())
+    return list_node("ul", items)
 
 
 def handle_ordered_list(block):
@@ -127,36 +182,120 @@ def handle_ordered_list(block):
             raise ValueError(f"Invalid ordered list item: {line}")
         item_text = parts[1].strip()
         items.append(item_text)
-    li_nodes = []
-    for item in items:
-        children = text_to_children(item)
-        li_node = ParentNode("li", children=children)
-        li_nodes.append(li_node)
-    return ParentNode("ol", children=li_nodes)
+    return list_node("ol", items)
 
 
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return handle_paragraph(block)
-    elif block_type == BlockType.HEADING:
+    if is_heading(block):
         return handle_heading(block)
-    elif block_type == BlockType.CODE:
+    if is_code(block):
         return handle_code(block)
+
+    # the lines are split once, and the classifier's per-line text is used
+    # to build the node directly
+    block_type, items = classify_lines(block.split("\n"))
+    if block_type == BlockType.PARAGRAPH:
+        return ParentNode("p", children=text_to_children(" ".join(items)))
     elif block_type == BlockType.QUOTE:
-        return handle_quote(block)
+        return ParentNode("blockquote", children=text_to_children(" ".join(items)))
     elif block_type == BlockType.UNORDERED_LIST:
-        return handle_unordered_list(block)
+        return list_node("ul", items)
     elif block_type == BlockType.ORDERED_LIST:
-        return handle_ordered_list(block)
+        return list_node("ol", items)
     else:
         raise Exception(f"Unknown block type: {block_type}")
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown, block_cache=None):
+    # markdown is a string or anything iter_blocks accepts
+    if isinstance(markdown, str):
+        blocks = markdown_to_blocks(markdown)
+    else:
+        blocks = iter_blocks(markdown)
     children = []
     for block in blocks:
-        child = block_to_html_node(block)
+        if block_cache is None:
+            child = block_to_html_node(block)
+        else:
+            # already rendered, so it's emitted as-is
+            child = RawNode(block_cache.render(block))
         children.append(child)
     return ParentNode("div", children, None)
 
+def write_markdown_html(lines, sink, block_cache=None):
+    # Same markup as markdown_to_html_node(...).write_html(sink), but renders
+    # and writes one block at a time, so memory stays bounded by the largest
+    # block rather than the document.
+    sink.write("<div>")
+    for block in iter_blocks(lines):
+        if block_cache is None:
+            block_to_html_node(block).write_html(sink)
+        else:
+            sink.write(block_cache.render(block))
+    sink.write("</div>")
+
+class BlockCache:
+    # LRU cache of rendered HTML keyed by block text. The block type is a
+    # function of the text, so the text alone is enough of a key. Optionally
+    # persisted as JSON; `version` should change whenever rendering does, and
+    # a file written by another version is ignored. With track_new, blocks
+    # rendered since the last take_new are kept for a pool worker to send
+    # back to the build that saves the cache (see add).
+    def __init__(self, max_entries=10000, path=None, version="", track_new=False):
+        self.max_entries = max_entries
+        self.path = path
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._new = [] if track_new else None
+        if path is not None:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, block):
+        html = self._entries.get(block)
+        if html is not None:
+            self._entries.move_to_end(block)
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = block_to_html_node(block).to_html()
+        self._entries[block] = html
+        if self._new is not None:
+            self._new.append((block, html))
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return html
+
+    def take_new(self):
+        new, self._new = self._new, []
+        return new
+
+    def add(self, entries):
+        # blocks rendered elsewhere, as most recently used
+        for block, html in entries:
+            self._entries[block] = html
+            self._entries.move_to_end(block)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("version") != self.version:
+            return
+        for block, html in data["blocks"][-self.max_entries:]:
+            self._entries[block] = html
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, "blocks": list(self._entries.items())}, f)
+        os.replace(tmp_path, self.path)
+
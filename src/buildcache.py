@@ -0,0 +1,99 @@
+import hashlib
+import os
+import shutil
+
+CACHE_DIR = os.path.join(".cache", "pages")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+# modules whose source decides what a page renders to
+RENDERER_MODULES = ("block_markdown", "inline_markdown", "htmlnode", "textnode", "gencontent", "highlight", "template")
+
+def renderer_version():
+    # Hash the renderer's own source, so any change to it invalidates the cache
+    # without anyone remembering to bump a version number.
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in RENDERER_MODULES:
+        with open(os.path.join(src_dir, module + ".py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def add_parts(digest, parts):
+    for part in parts:
+        data = part.encode() if isinstance(part, str) else part
+        # length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+
+class BuildCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, version=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version if version is not None else renderer_version()
+
+    def key(self, *parts):
+        digest = hashlib.sha256(self.version.encode())
+        add_parts(digest, parts)
+        return digest.hexdigest()
+
+    def file_key(self, path, *parts):
+        # The same as key(<the file's bytes>, *parts), read a chunk at a time
+        # so a large source is never held in memory
+        digest = hashlib.sha256(self.version.encode())
+        with open(path, "rb") as f:
+            digest.update(os.fstat(f.fileno()).st_size.to_bytes(8, "little"))
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        add_parts(digest, parts)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".html")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            # bump the mtime so eviction sees this entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, src_path):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # workers may store the same key at once; os.replace keeps that safe
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def put_data(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        entries = []
+        total = 0
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                st = os.stat(path)
+                entries.append((st.st_mtime_ns, st.st_size, path))
+                total += st.st_size
+
+        # least recently used first
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            evicted += 1
+        return evicted
@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from copystatic import load_manifest, save_manifest, walk_files
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_PATH = os.path.join(".cache", "compress-manifest.json")
+EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".map", ".wasm")
+MIN_SIZE = 1024
+
+def gzip_compress(data):
+    # mtime=0 keeps the output byte-for-byte reproducible
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def available_encoders():
+    encoders = {".gz": gzip_compress}
+    if zstandard is not None:
+        encoders[".zst"] = zstandard.ZstdCompressor(level=19).compress
+    if brotli is not None:
+        encoders[".br"] = brotli.compress
+    return encoders
+
+SIDECAR_SUFFIXES = (".gz", ".zst", ".br")
+
+class CompressStats:
+    __slots__ = ("compressed", "skipped", "original_bytes", "compressed_bytes", "removed")
+
+    def __init__(self):
+        self.compressed = 0
+        self.skipped = 0
+        self.original_bytes = 0
+        self.compressed_bytes = 0
+        self.removed = 0
+
+    def __str__(self):
+        return (
+            f"Compressed {self.compressed} files ({self.original_bytes} -> {self.compressed_bytes} bytes), "
+            f"skipped {self.skipped} unchanged files, removed {self.removed} stale sidecars"
+        )
+
+def compress_public(dest_dir="public", jobs=None, min_size=MIN_SIZE, extensions=EXTENSIONS, manifest_path=MANIFEST_PATH):
+    # The manifest maps each compressed file to its content hash and the
+    # sidecars written for it, so unchanged files are skipped next time.
+    old_manifest = load_manifest(manifest_path)
+    new_manifest = {}
+    stats = CompressStats()
+
+    tasks = []
+    # listed up front because stale sidecars are deleted along the way
+    for rel_path, st in list(walk_files(dest_dir)):
+        path = os.path.join(dest_dir, rel_path)
+        if is_sidecar(rel_path, extensions):
+            # a sidecar whose source is gone
+            if not os.path.exists(os.path.splitext(path)[0]):
+                os.remove(path)
+                stats.removed += 1
+            continue
+        if not rel_path.endswith(extensions):
+            continue
+        if st.st_size < min_size:
+            stats.removed += remove_sidecars(path)
+            continue
+        tasks.append((rel_path, path, old_manifest.get(rel_path)))
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(tasks)))
+    if jobs == 1:
+        results = map(compress_one, tasks)
+        record_results(results, new_manifest, stats)
+    else:
+        # workers get paths and hashes and send back hashes and sizes only
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            record_results(executor.map(compress_one, tasks, chunksize=chunksize), new_manifest, stats)
+
+    save_manifest(manifest_path, new_manifest)
+    print(stats)
+    return stats
+
+def is_sidecar(rel_path, extensions=EXTENSIONS):
+    # Only a compressed copy of a file type we compress counts, so a static
+    # archive.tar.gz is left alone
+    source, suffix = os.path.splitext(rel_path)
+    return suffix in SIDECAR_SUFFIXES and source.endswith(extensions)
+
+def remove_compressed(dest_dir="public", extensions=EXTENSIONS, manifest_path=MANIFEST_PATH):
+    # For builds without compression: a generation is seeded from the last
+    # one, so sidecars from an earlier compressed build would otherwise keep
+    # serving old content.
+    removed = 0
+    for rel_path, _ in list(walk_files(dest_dir)):
+        if is_sidecar(rel_path, extensions):
+            os.remove(os.path.join(dest_dir, rel_path))
+            removed += 1
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    if removed:
+        print(f"Removed {removed} compressed sidecars")
+    return removed
+
+def record_results(results, manifest, stats):
+    for rel_path, entry, original_size, compressed_size, removed in results:
+        manifest[rel_path] = entry
+        stats.removed += removed
+        if not compressed_size:
+            # unchanged, or nothing got smaller
+            stats.skipped += 1
+        else:
+            stats.compressed += 1
+            stats.original_bytes += original_size
+            stats.compressed_bytes += compressed_size
+
+def compress_one(task):
+    rel_path, path, previous = task
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if previous is not None and previous[0] == digest and all(os.path.exists(path + suffix) for suffix in previous[1]):
+        return rel_path, previous, len(data), None, 0
+
+    written = []
+    compressed_size = 0
+    removed = 0
+    for suffix, encode in available_encoders().items():
+        compressed = encode(data)
+        sidecar = path + suffix
+        if len(compressed) >= len(data):
+            # not worth serving; make sure no stale copy is left either
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+                removed += 1
+            continue
+        tmp_path = sidecar + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, sidecar)
+        written.append(suffix)
+        compressed_size += len(compressed)
+    return rel_path, [digest, written], len(data), compressed_size, removed
+
+def remove_sidecars(path):
+    removed = 0
+    for suffix in SIDECAR_SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+            removed += 1
+    return removed
@@ -0,0 +1,258 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from fingerprint import MANIFEST_NAME as ASSET_MANIFEST_NAME, fingerprint_path, write_asset_manifest
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MANIFEST_PATH = os.path.join(".cache", "static-manifest.json")
+LINK_MODES = ("copy", "hardlink", "reflink")
+# ioctl request number for FICLONE on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+# errors meaning "this filesystem can't do that", so we fall back to copying
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY, errno.EMLINK}
+
+class SyncStats:
+    __slots__ = ("copied", "copied_bytes", "skipped", "skipped_bytes", "deleted", "assets")
+
+    def __init__(self):
+        self.copied = 0
+        self.copied_bytes = 0
+        self.skipped = 0
+        self.skipped_bytes = 0
+        self.deleted = 0
+        # source path -> output path, both relative
+        self.assets = {}
+
+    def __str__(self):
+        return (
+            f"Copied {self.copied} files ({self.copied_bytes} bytes), "
+            f"skipped {self.skipped} unchanged files ({self.skipped_bytes} bytes), "
+            f"deleted {self.deleted} files"
+        )
+
+def copy_static_to_public(
+    src="static",
+    dst="public",
+    incremental=True,
+    use_hash=False,
+    manifest_path=MANIFEST_PATH,
+    threads=None,
+    link_mode="copy",
+    verbose=False,
+    fingerprint=False,
+):
+    if not incremental:
+        if os.path.exists(dst):
+            print(f"Deleting existing destination: {dst}")
+            shutil.rmtree(dst)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+    stats = sync_tree(src, dst, manifest_path, use_hash, threads, link_mode, verbose, fingerprint)
+    if fingerprint:
+        write_asset_manifest(dst, stats.assets)
+    elif os.path.exists(os.path.join(dst, ASSET_MANIFEST_NAME)):
+        os.remove(os.path.join(dst, ASSET_MANIFEST_NAME))
+    print(stats)
+    return stats
+
+def sync_tree(src, dst, manifest_path, use_hash=False, threads=None, link_mode="copy", verbose=False, fingerprint=False):
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {link_mode}")
+    # The manifest records the source size, mtime, content hash (when hashing)
+    # and output path of every file we copied, so unchanged files can be
+    # skipped next time and files removed from src can be removed from dst
+    # without touching anything else that lives there. Fingerprinting names
+    # outputs after the content hash, which the manifest caches by mtime.
+    use_hash = use_hash or fingerprint
+    old_manifest = load_manifest(manifest_path)
+    new_manifest = {}
+    stats = SyncStats()
+    os.makedirs(dst, exist_ok=True)
+
+    to_copy = []
+    created_dirs = {dst}
+    for rel_path, src_stat in walk_files(src):
+        src_path = os.path.join(src, rel_path)
+        entry = [src_stat.st_size, src_stat.st_mtime_ns, None, rel_path]
+        previous = old_manifest.get(rel_path)
+        unchanged = previous is not None and is_unchanged(src_path, entry, previous, use_hash)
+        if fingerprint:
+            if entry[2] is None:
+                entry[2] = file_hash(src_path)
+            entry[3] = fingerprint_path(rel_path, entry[2])
+        new_manifest[rel_path] = entry
+        stats.assets[rel_path] = entry[3]
+        dst_path = os.path.join(dst, entry[3])
+
+        if unchanged and manifest_output(rel_path, previous) == entry[3] and dst_matches(dst_path, src_stat.st_size):
+            stats.skipped += 1
+            stats.skipped_bytes += src_stat.st_size
+            continue
+
+        dst_dir = os.path.dirname(dst_path)
+        if dst_dir not in created_dirs:
+            os.makedirs(dst_dir, exist_ok=True)
+            created_dirs.add(dst_dir)
+        to_copy.append((src_path, dst_path, entry))
+
+    # Copies are dominated by syscall latency, so a small thread pool keeps
+    # several in flight. Results come back in walk order.
+    def copy_one(task):
+        src_path, dst_path, entry = task
+        copy_file(src_path, dst_path, link_mode)
+        if use_hash and entry[2] is None:
+            entry[2] = file_hash(src_path)
+        return task
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for src_path, dst_path, entry in executor.map(copy_one, to_copy):
+            if verbose:
+                print(f"Copied file: {src_path} -> {dst_path}")
+            stats.copied += 1
+            stats.copied_bytes += entry[0]
+
+    new_outputs = {entry[3] for entry in new_manifest.values()}
+    for rel_path, previous in old_manifest.items():
+        output = manifest_output(rel_path, previous)
+        if output in new_outputs:
+            continue
+        dst_path = os.path.join(dst, output)
+        if os.path.isfile(dst_path):
+            os.remove(dst_path)
+            if verbose:
+                print(f"Deleted file: {dst_path}")
+            stats.deleted += 1
+        prune_empty_dirs(os.path.dirname(dst_path), dst)
+
+    save_manifest(manifest_path, new_manifest)
+    return stats
+
+def manifest_output(rel_path, entry):
+    # manifests written before fingerprinting have no output path
+    return entry[3] if len(entry) > 3 else rel_path
+
+def is_unchanged(src_path, entry, previous, use_hash):
+    if previous[0] != entry[0]:
+        return False
+    if previous[1] == entry[1]:
+        entry[2] = previous[2]
+        return True
+    if not use_hash:
+        return False
+    # Same size but a new mtime (e.g. a fresh checkout): compare contents
+    entry[2] = file_hash(src_path)
+    return entry[2] == previous[2]
+
+def dst_matches(dst_path, size):
+    try:
+        return os.stat(dst_path).st_size == size
+    except FileNotFoundError:
+        return False
+
+def walk_files(root):
+    # os.scandir gives us file types from the directory listing itself and
+    # caches the stat result on each entry
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        sub_dirs = []
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            if entry.is_dir():
+                sub_dirs.append(rel_path)
+            elif entry.is_file():
+                yield rel_path, entry.stat()
+        pending.extend(reversed(sub_dirs))
+
+def copy_file(src_path, dst_path, link_mode="copy"):
+    # Never write through an existing destination: in hardlink mode it may be
+    # the same inode as the source.
+    try:
+        os.unlink(dst_path)
+    except FileNotFoundError:
+        pass
+
+    if link_mode == "hardlink":
+        try:
+            os.link(src_path, dst_path)
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+    elif link_mode == "reflink" and fcntl is not None:
+        try:
+            with open(src_path, "rb") as fsrc, open(dst_path, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src_path, dst_path)
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+
+    kernel_copy(src_path, dst_path)
+    shutil.copystat(src_path, dst_path)
+
+def kernel_copy(src_path, dst_path):
+    # Let the kernel move the bytes (copy_file_range can also share extents
+    # or do server-side copies), falling back to sendfile, then plain reads.
+    with open(src_path, "rb") as fsrc, open(dst_path, "wb") as fdst:
+        src_fd = fsrc.fileno()
+        dst_fd = fdst.fileno()
+        size = os.fstat(src_fd).st_size
+        for copy_chunk in (copy_file_range_chunk, sendfile_chunk):
+            offset = 0
+            try:
+                while offset < size:
+                    sent = copy_chunk(src_fd, dst_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except (AttributeError, OSError):
+                # only safe to try the next method if nothing was written yet
+                if offset:
+                    raise
+        shutil.copyfileobj(fsrc, fdst)
+
+def copy_file_range_chunk(src_fd, dst_fd, offset, count):
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+def sendfile_chunk(src_fd, dst_fd, offset, count):
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def prune_empty_dirs(path, root):
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root) and os.path.isdir(path) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,40 @@
+import json
+import os
+import re
+
+HASH_LENGTH = 8
+MANIFEST_NAME = "asset-manifest.json"
+# root-relative href/src attributes in rendered HTML and templates
+REF_RE = re.compile(r'\b(href|src)="(/[^"]*)"')
+
+def fingerprint_path(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+def asset_urls(assets):
+    # {"images/a.png": "images/a.1234abcd.png"} -> {"/images/a.png": "/images/a.1234abcd.png"}
+    urls = {}
+    for rel_path, output in assets.items():
+        if rel_path != output:
+            urls["/" + rel_path.replace(os.sep, "/")] = "/" + output.replace(os.sep, "/")
+    return urls
+
+def rewrite_refs(html, urls):
+    if not urls:
+        return html
+
+    def replace(match):
+        url = match.group(2)
+        return f'{match.group(1)}="{urls.get(url, url)}"'
+
+    return REF_RE.sub(replace, html)
+
+def write_asset_manifest(dest_dir, assets):
+    path = os.path.join(dest_dir, MANIFEST_NAME)
+    urls = asset_urls(assets)
+    # replaced rather than rewritten, like every output (see publish.py)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(urls, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return path
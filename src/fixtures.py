@@ -0,0 +1,34 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+# Shared by the tests that work on files
+
+
+class TempDirTestCase(unittest.TestCase):
+    # Each test gets a fresh temporary directory, removed afterwards. write
+    # and read take paths relative to self.root, the directory by default;
+    # absolute paths are used as they are.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def write(self, rel_path, content):
+        # text or bytes, creating parent directories
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+        return path
+
+    def read(self, rel_path):
+        with open(os.path.join(self.root, rel_path)) as f:
+            return f.read()
+
+
+def quiet():
+    # captures what's printed: `with quiet() as out:`, then out.getvalue()
+    return contextlib.redirect_stdout(io.StringIO())
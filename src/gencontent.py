@@ -0,0 +1,262 @@
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from block_markdown import BlockCache, iter_blocks, write_markdown_html
+from buildcache import renderer_version
+from fingerprint import rewrite_refs
+from highlight import DEFAULT_THEME, Highlighter, get_highlighter, set_highlighter
+from htmlnode import escape
+from inline_markdown import extract_markdown_urls
+from publish import FileWriter, copy_to
+from template import Template, compile_template, load_template
+from textnode import set_asset_urls, set_image_attributes, url_attributes
+
+# smaller pages are rendered into memory and written by a FileWriter in the
+# background; larger ones stream straight into their output file
+STREAM_MIN_BYTES = 1024 * 1024
+BLOCK_CACHE_PATH = os.path.join(".cache", "blocks.json")
+HIGHLIGHT_CACHE_PATH = os.path.join(".cache", "highlight.json")
+
+# set in each worker process by init_worker so the template and cache are
+# sent once per worker instead of once per page
+_template = None
+_cache = None
+_block_cache = None
+_cache_salt = ""
+# only set for in-process builds, see generate_pages
+_writer = None
+
+def extract_title(markdown):
+    # markdown is a string or its lines, such as an open file; lines are only
+    # read up to the title
+    lines = markdown.split("\n") if isinstance(markdown, str) else markdown
+    for line in lines:
+        if line.startswith("# "):
+            return line[2:].strip()
+    raise Exception("No title found")
+
+def find_markdown_files(content_dir):
+    paths = []
+    for dir_path, dir_names, file_names in os.walk(content_dir):
+        dir_names.sort()
+        for name in file_names:
+            if name.endswith(".md"):
+                paths.append(os.path.relpath(os.path.join(dir_path, name), content_dir))
+    paths.sort()
+    return paths
+
+def output_path(rel_path):
+    return os.path.splitext(rel_path)[0] + ".html"
+
+def generate_page(from_path, template, dest_path, cache=None, block_cache=None, cache_salt="", writer=None):
+    # Returns the page size and whether it came from the cache. cache_salt
+    # covers site-wide inputs other than the markdown and template (see
+    # render_salt); the page's own links and images are salted separately
+    # (see asset_salt).
+    # template is a Template or the template text. The markdown is never
+    # read into memory whole: it's hashed in chunks for the cache key and
+    # rendered a block at a time (see MarkdownFile). Pages replace dest_path
+    # rather than writing into it, since it may be hardlinked into the
+    # published site (see publish.Generations); a FileWriter does the writes
+    # of small pages in the background.
+    if isinstance(template, str):
+        template = compile_template(template)
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+
+    if cache is not None:
+        key = cache.file_key(from_path, template.source, cache_salt, asset_salt(from_path))
+        cached_path = cache.get(key)
+        if cached_path is not None:
+            if writer is not None:
+                writer.copy(cached_path, dest_path)
+            else:
+                copy_to(cached_path, dest_path)
+            return os.path.getsize(cached_path), True
+
+    with open(from_path) as f:
+        # the title is text, but the template may put it in an attribute too
+        title = escape(extract_title(f))
+    values = {"Title": title, "Content": MarkdownFile(from_path, block_cache)}
+
+    if writer is not None and os.path.getsize(from_path) < STREAM_MIN_BYTES:
+        sink = io.StringIO()
+        template.write(sink, values)
+        data = sink.getvalue().encode()
+        writer.write(dest_path, data)
+        if cache is not None:
+            cache.put_data(key, data)
+        return len(data), False
+
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        template.write(f, values)
+    os.replace(tmp_path, dest_path)
+
+    if cache is not None:
+        cache.put(key, dest_path)
+    return os.path.getsize(dest_path), False
+
+class MarkdownFile:
+    # A page's content for Template.write: rendered from the file one block
+    # at a time as it's written, so memory is bounded by the largest block
+    # rather than the page
+    __slots__ = ("path", "block_cache")
+
+    def __init__(self, path, block_cache=None):
+        self.path = path
+        self.block_cache = block_cache
+
+    def write_html(self, sink):
+        with open(self.path) as f:
+            write_markdown_html(f, sink, self.block_cache)
+
+def render_salt(*options):
+    # changes whenever any option that affects rendered pages does
+    data = json.dumps(options, sort_keys=True).encode()
+    return hashlib.sha256(data).hexdigest()
+
+def asset_salt(path):
+    # The fingerprinted URLs, image sizes and loading of just the links and
+    # images on the page, so changing one image or stylesheet re-renders the
+    # pages that use it rather than the whole site. URLs in code count too,
+    # which at worst re-renders a page that didn't need it.
+    urls = set()
+    with open(path) as f:
+        for block in iter_blocks(f):
+            if "](" not in block:
+                continue
+            urls.update(url for _, url in extract_markdown_urls(block))
+    return render_salt(sorted((url, url_attributes(url)) for url in urls))
+
+def init_worker(
+    template,
+    cache=None,
+    block_cache_path=None,
+    asset_urls=None,
+    image_sizes=None,
+    eager_images=(),
+    highlight_theme=DEFAULT_THEME,
+    use_pygments=True,
+    highlight_cache_path=None,
+    track_new=False,
+):
+    global _template, _cache, _block_cache, _cache_salt
+    _template = template
+    _cache = cache
+    highlighter = None
+    if highlight_theme is not None:
+        highlighter = Highlighter(highlight_theme, use_pygments, path=highlight_cache_path, track_new=track_new)
+    set_highlighter(highlighter)
+    backend = highlighter.backend if highlighter is not None else None
+    _cache_salt = render_salt(highlight_theme, backend)
+    set_asset_urls(asset_urls)
+    set_image_attributes(image_sizes, eager_images)
+    _block_cache = None
+    if block_cache_path is not None:
+        # cached blocks aren't keyed by the URLs in them, so any asset change
+        # starts the block cache over; pages that miss then re-render without
+        # its help, but only those pages miss
+        salt = render_salt(asset_urls, image_sizes, list(eager_images), highlight_theme, backend)
+        _block_cache = BlockCache(path=block_cache_path, version=renderer_version() + salt, track_new=track_new)
+
+def generate_one(task):
+    from_path, dest_path = task
+    size, hit = generate_page(from_path, _template, dest_path, _cache, _block_cache, _cache_salt, _writer)
+    return dest_path, size, hit
+
+def generate_one_tracked(task):
+    # in a pool worker: the page, plus the blocks and code it rendered for the
+    # parent to save
+    highlighter = get_highlighter()
+    return (
+        generate_one(task),
+        _block_cache.take_new() if _block_cache is not None else [],
+        highlighter.take_new() if highlighter is not None else [],
+    )
+
+def generate_pages(
+    content_dir="content",
+    template_path="template.html",
+    dest_dir="public",
+    jobs=None,
+    cache=None,
+    block_cache_path=None,
+    asset_urls=None,
+    image_sizes=None,
+    eager_images=(),
+    highlight_theme=DEFAULT_THEME,
+    use_pygments=True,
+    highlight_cache_path=None,
+):
+    global _writer
+    template = load_template(template_path)
+    if "Content" not in template.slots:
+        raise ValueError(f"Template has no {{{{ Content }}}} placeholder: {template_path}")
+    # asset_urls maps root-relative static URLs to their fingerprinted names;
+    # image_sizes maps image URLs to (width, height) and turns on lazy loading
+    # for every image not matching a pattern in eager_images; code blocks
+    # tagged with a language are highlighted unless highlight_theme is None
+    if asset_urls:
+        template = Template(rewrite_refs(template.source, asset_urls), template.files)
+
+    tasks = [
+        (os.path.join(content_dir, rel_path), os.path.join(dest_dir, output_path(rel_path)))
+        for rel_path in find_markdown_files(content_dir)
+    ]
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(tasks)))
+
+    # Workers only receive paths and send back the output path and size; node
+    # trees never cross the process boundary. executor.map keeps input order,
+    # so the results are deterministic whatever the scheduling.
+    # Pool workers each keep their own in-memory block and highlight caches,
+    # seeded from the persisted ones, and send back what they rendered; the
+    # parent merges that into its own copies and saves them. An in-process
+    # build also hands its writes to a thread pool, which a pool worker
+    # couldn't wait on before exiting.
+    initargs = (
+        template,
+        cache,
+        block_cache_path,
+        asset_urls,
+        image_sizes,
+        eager_images,
+        highlight_theme,
+        use_pygments,
+        highlight_cache_path,
+    )
+    init_worker(*initargs)
+    if jobs == 1:
+        try:
+            with FileWriter() as _writer:
+                results = [generate_one(task) for task in tasks]
+        finally:
+            _writer = None
+        new_blocks = _block_cache is not None and _block_cache.misses
+    else:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        results = []
+        new_blocks = False
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs + (True,)) as executor:
+            for result, blocks, highlighted in executor.map(generate_one_tracked, tasks, chunksize=chunksize):
+                results.append(result)
+                if blocks and _block_cache is not None:
+                    _block_cache.add(blocks)
+                    new_blocks = True
+                if highlighted and get_highlighter() is not None:
+                    get_highlighter().add(highlighted)
+    if new_blocks:
+        _block_cache.save()
+    if get_highlighter() is not None:
+        get_highlighter().save()
+
+    total_bytes = sum(size for _, size, _ in results)
+    print(f"Generated {len(results)} pages ({total_bytes} bytes) with {jobs} jobs")
+    if cache is not None:
+        hits = sum(1 for _, _, hit in results if hit)
+        evicted = cache.evict()
+        print(f"Build cache: {hits} hits, {len(results) - hits} misses, {evicted} evicted")
+    return results
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+try:
+    import pygments
+    from pygments import highlight as pygments_highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    pygments = None
+
+CACHE_PATH = os.path.join(".cache", "highlight.json")
+DEFAULT_THEME = "default"
+
+# token class -> inline style. The class names are Pygments' short ones.
+THEMES = {
+    "default": {
+        "c": "color:#408080;font-style:italic",
+        "k": "color:#008000;font-weight:bold",
+        "kc": "color:#008000;font-weight:bold",
+        "nb": "color:#008000",
+        "nt": "color:#008000;font-weight:bold",
+        "na": "color:#7d9029",
+        "nv": "color:#19177c",
+        "s": "color:#ba2121",
+        "m": "color:#666666",
+    },
+    "monokai": {
+        "c": "color:#75715e",
+        "k": "color:#66d9ef",
+        "kc": "color:#66d9ef",
+        "nb": "color:#f8f8f2",
+        "nt": "color:#f92672",
+        "na": "color:#a6e22e",
+        "nv": "color:#f8f8f2",
+        "s": "color:#e6db74",
+        "m": "color:#ae81ff",
+    },
+}
+
+# An unclosed string or comment runs to the end of its line (or of the
+# code), so it's one long token rather than a failed match that's retried
+# from every later quote. Lexers are compiled with re.MULTILINE.
+_STRING = r'"(?:[^"\\\n]|\\.)*(?:"|\\?$)|' + r"'(?:[^'\\\n]|\\.)*(?:'|\\?$)"
+_NUMBER = r"\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)\b"
+
+def words(names):
+    return r"\b(?:" + "|".join(names.split()) + r")\b"
+
+# language -> [(token class, pattern)], tried in order at each position
+LEXER_RULES = {
+    "python": [
+        ("c", r"#[^\n]*"),
+        ("s", r'[rbuRBU]{0,2}(?:"""[\s\S]*?(?:"""|\Z)|' + r"'''[\s\S]*?(?:'''|\Z)|" + _STRING + ")"),
+        ("k", words("and as assert async await break class continue def del elif else except finally for from global if import in is lambda nonlocal not or pass raise return try while with yield match case")),
+        ("kc", words("True False None")),
+        ("nb", words("print len range str int float list dict set tuple bool open super isinstance enumerate zip map sorted self")),
+        ("m", _NUMBER),
+    ],
+    "javascript": [
+        ("c", r"//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)"),
+        ("s", _STRING + r"|`(?:[^`\\]|\\[\s\S])*(?:`|\Z)"),
+        ("k", words("async await break case catch class const continue default delete do else export extends finally for from function if import in instanceof let new of return switch this throw try typeof var void while yield")),
+        ("kc", words("true false null undefined NaN")),
+        ("m", _NUMBER),
+    ],
+    "json": [
+        ("nt", r'"(?:[^"\\\n]|\\.)*"(?=\s*:)'),
+        ("s", _STRING),
+        ("kc", words("true false null")),
+        ("m", r"-?" + _NUMBER),
+    ],
+    "bash": [
+        ("c", r"(?<![\w$])#[^\n]*"),
+        ("s", _STRING),
+        ("nv", r"\$\{[^}\n]*\}|\$\w+"),
+        ("k", words("if then else elif fi for while until do done case esac in function return local export")),
+        ("m", _NUMBER),
+    ],
+    "css": [
+        ("c", r"/\*[\s\S]*?(?:\*/|\Z)"),
+        ("s", _STRING),
+        ("nb", r"[\w-]+(?=\s*:)"),
+        ("m", r"#[0-9a-fA-F]{3,8}\b|-?\d+(?:\.\d+)?(?:[a-z]+|%)?"),
+    ],
+    "html": [
+        ("c", r"<!--[\s\S]*?(?:-->|\Z)"),
+        ("nt", r"</?[\w:-]+|/?>"),
+        ("na", r"[\w:-]+(?==)"),
+        ("s", _STRING),
+    ],
+}
+ALIASES = {"py": "python", "js": "javascript", "sh": "bash", "shell": "bash", "xml": "html"}
+
+_lexers = {}
+
+def lexer(language):
+    # one alternation per language; each group's name is its rule's index
+    language = ALIASES.get(language, language)
+    if language not in LEXER_RULES:
+        return None
+    if language not in _lexers:
+        rules = LEXER_RULES[language]
+        pattern = "|".join(f"(?P<t{i}>{regex})" for i, (_, regex) in enumerate(rules))
+        _lexers[language] = (re.compile(pattern, re.MULTILINE), [token for token, _ in rules])
+    return _lexers[language]
+
+def escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def builtin_highlight(code, language, theme=DEFAULT_THEME):
+    compiled = lexer(language)
+    if compiled is None:
+        return None
+    pattern, tokens = compiled
+    styles = THEMES.get(theme, THEMES[DEFAULT_THEME])
+    parts = []
+    pos = 0
+    for match in pattern.finditer(code):
+        if match.start() > pos:
+            parts.append(escape(code[pos:match.start()]))
+        style = styles.get(tokens[int(match.lastgroup[1:])])
+        text = escape(match.group())
+        parts.append(f'<span style="{style}">{text}</span>' if style else text)
+        pos = match.end()
+    parts.append(escape(code[pos:]))
+    return "".join(parts)
+
+def pygments_highlight_code(code, language, theme=DEFAULT_THEME):
+    try:
+        lexer = get_lexer_by_name(language)
+        formatter = HtmlFormatter(nowrap=True, noclasses=True, style=theme)
+    except ClassNotFound:
+        return None
+    return pygments_highlight(code, lexer, formatter).rstrip("\n")
+
+def source_version():
+    # A hash of this module's source, which holds the built-in lexer rules
+    # and themes; any change to it starts a persisted cache over
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class Highlighter:
+    # Highlighted HTML for code blocks, keyed by a hash of the code, language,
+    # theme and backend, so unchanged blocks are never lexed again. An LRU
+    # like block_markdown.BlockCache, optionally persisted as JSON; a file
+    # written by another `version` is ignored. track_new, take_new and add
+    # work as they do for BlockCache.
+    def __init__(self, theme=DEFAULT_THEME, use_pygments=True, max_entries=10000, path=None, version=None, track_new=False):
+        self.theme = theme
+        self.use_pygments = use_pygments and pygments is not None
+        self.backend = f"pygments-{pygments.__version__}" if self.use_pygments else "builtin"
+        self.max_entries = max_entries
+        self.path = path
+        self.version = version if version is not None else source_version()
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._changed = False
+        self._new = [] if track_new else None
+        if path is not None:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, code, language):
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (code, language, self.theme, self.backend):
+            data = part.encode()
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def highlight(self, code, language):
+        # None when the language isn't known
+        key = self.key(code, language)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        html = None
+        if self.use_pygments:
+            html = pygments_highlight_code(code, language, self.theme)
+        if html is None:
+            html = builtin_highlight(code, language, self.theme)
+        self._entries[key] = html
+        self._changed = True
+        if self._new is not None:
+            self._new.append((key, html))
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return html
+
+    def take_new(self):
+        new, self._new = self._new, []
+        return new
+
+    def add(self, entries):
+        for key, html in entries:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            self._changed = True
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return
+        for key, html in data["entries"][-self.max_entries:]:
+            self._entries[key] = html
+
+    def save(self):
+        if not self._changed or self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, "entries": list(self._entries.items())}, f)
+        os.replace(tmp_path, self.path)
+        self._changed = False
+
+# used by block_markdown.handle_code, see set_highlighter
+_highlighter = Highlighter()
+
+def set_highlighter(highlighter):
+    global _highlighter
+    _highlighter = highlighter
+
+def get_highlighter():
+    return _highlighter
+
+def highlight_code(code, language):
+    if _highlighter is None:
+        return None
+    return _highlighter.highlight(code, language)
@@ -1,4 +1,35 @@
+from types import MappingProxyType
+
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Text and attribute values are escaped as they're written out, each with
+# only the characters that are special in its context: "&" and "<" start
+# markup in text, "&" and '"' in a double-quoted attribute value. Most
+# strings have nothing to escape, and the membership tests find that without
+# building a new string; str.translate with these multi-character
+# replacements is many times slower than replace() in CPython. Values that
+# aren't strings (a width of 640, say) are written as str() gives them.
+def escape_text(text):
+    if not isinstance(text, str):
+        text = str(text)
+    if "&" in text or "<" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;")
+    return text
+
+def escape_attribute(value):
+    if not isinstance(value, str):
+        value = str(value)
+    if "&" in value or '"' in value:
+        return value.replace("&", "&amp;").replace('"', "&quot;")
+    return value
+
+def escape(value):
+    # for values that may land in either context, such as template slots
+    return escape_text(value).replace('"', "&quot;")
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,37 +39,183 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def iter_html(self):
+        # Walk the tree with an explicit stack so deeply nested pages can't hit
+        # the recursion limit. The stack holds nodes and pending closing tags.
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+            elif isinstance(item, ParentNode):
+                item.check()
+                yield f"<{item.tag}{item.props_to_html()}>"
+                stack.append(f"</{item.tag}>")
+                stack.extend(reversed(item.children))
+            else:
+                yield item.to_html()
+
+    def write_html(self, sink):
+        # Batch the small chunks so file sinks see a few large writes
+        buffer = []
+        size = 0
+        for chunk in self.iter_html():
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= WRITE_BUFFER_SIZE:
+                sink.write("".join(buffer))
+                buffer = []
+                size = 0
+        if buffer:
+            sink.write("".join(buffer))
+
     def props_to_html(self):
         if not self.props:
             return ""
-        return "".join(f' {key}="{value}"' for key, value in self.props.items())
+        parts = []
+        for key, value in self.props.items():
+            # the fast path of escape_attribute, without the call
+            if not isinstance(value, str) or "&" in value or '"' in value:
+                value = escape_attribute(value)
+            parts.append(f' {key}="{value}"')
+        return "".join(parts)
+
+    def freeze(self):
+        # see FrozenNode
+        return FrozenNode(self)
 
     def __repr__(self):
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag=tag, value=value, children=None, props=props)
 
     def to_html(self):
         if self.value is None:
             raise ValueError("LeafNode must have a value")
+        value = self.value
+        if not isinstance(value, str) or "&" in value or "<" in value:
+            value = escape_text(value)
         if self.tag is None:
-            return self.value
-        props_str = self.props_to_html()
-        return f"<{self.tag}{props_str}>{self.value}</{self.tag}>"
+            return value
+        if not self.props:
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
+
+    def freeze(self):
+        # still a LeafNode, see FrozenLeaf
+        return FrozenLeaf(self)
+
+class RawNode(LeafNode):
+    # HTML that's already safe to emit, such as cached block output or
+    # highlighted code; written out as-is
+    __slots__ = ()
+
+    def __init__(self, html):
+        super().__init__(None, html)
+
+    def to_html(self):
+        if self.value is None:
+            raise ValueError("RawNode must have a value")
+        return self.value
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self):
+    def check(self):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
         if not self.children:
             raise ValueError("ParentNode must have children")
-        result = ""
-        for child in self.children:
-            result += child.to_html()
-        props_str = self.props_to_html()
-        return f"<{self.tag}{props_str}>{result}</{self.tag}>"
\ No newline at end of file
+
+    def to_html(self):
+        return "".join(self.iter_html())
+
+class FrozenNode(HTMLNode):
+    # A subtree shared between pages (a navigation bar, a footer, a link
+    # that's on every page) that serializes once: to_html, and write_html on
+    # any tree holding it, reuse the HTML from its first render, and `hits`
+    # counts the renders saved. It holds a frozen copy of the subtree, so
+    # changing any node in it raises instead of leaving the HTML stale.
+    __slots__ = ("node", "html", "hits")
+
+    def __init__(self, node):
+        if isinstance(node, FrozenNode):
+            node = node.node
+        node = frozen_copy(node)
+        for name in HTMLNode.__slots__:
+            object.__setattr__(self, name, getattr(node, name))
+        object.__setattr__(self, "node", node)
+        object.__setattr__(self, "html", None)
+        object.__setattr__(self, "hits", 0)
+
+    def __setattr__(self, name, value):
+        refuse_change(self, name)
+
+    def __delattr__(self, name):
+        refuse_change(self, name)
+
+    def to_html(self):
+        html = self.html
+        if html is None:
+            html = self.node.to_html()
+            object.__setattr__(self, "html", html)
+        else:
+            object.__setattr__(self, "hits", self.hits + 1)
+        return html
+
+    def freeze(self):
+        return self
+
+class FrozenLeaf(FrozenNode, LeafNode):
+    # A frozen LeafNode that still passes isinstance(node, LeafNode)
+    __slots__ = ()
+
+def refuse_change(node, name):
+    raise AttributeError(f"{type(node).__name__} is frozen, can't change {name!r}")
+
+# node class -> its frozen subclass, see frozen_class
+_frozen_classes = {}
+
+def frozen_class(cls):
+    # The same class with no way to set attributes. It adds no slots, so a
+    # frozen node is laid out (and sized) exactly like the original.
+    if cls in _frozen_classes.values():
+        return cls
+    if cls not in _frozen_classes:
+        namespace = {"__slots__": (), "__setattr__": FrozenNode.__setattr__, "__delattr__": FrozenNode.__delattr__}
+        _frozen_classes[cls] = type(f"Frozen{cls.__name__}", (cls,), namespace)
+    return _frozen_classes[cls]
+
+def frozen_copy(node):
+    # Copies the subtree bottom-up, with children as a tuple and props as a
+    # read-only mapping. FrozenNodes inside it are shared rather than copied,
+    # so a frozen footer keeps its cached HTML inside a bigger frozen tree.
+    copies = {}
+    stack = [(node, False)]
+    while stack:
+        item, expanded = stack.pop()
+        if id(item) in copies:
+            continue
+        if isinstance(item, FrozenNode):
+            copies[id(item)] = item
+            continue
+        if item.children is not None and not expanded:
+            stack.append((item, True))
+            stack.extend((child, False) for child in item.children)
+            continue
+        copy = object.__new__(frozen_class(type(item)))
+        children = None
+        if item.children is not None:
+            children = tuple(copies[id(child)] for child in item.children)
+        props = MappingProxyType(dict(item.props)) if item.props is not None else None
+        for name, value in (("tag", item.tag), ("value", item.value), ("children", children), ("props", props)):
+            object.__setattr__(copy, name, value)
+        copies[id(item)] = copy
+    return copies[id(node)]
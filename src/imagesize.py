@@ -0,0 +1,121 @@
+import json
+import os
+import struct
+from copystatic import save_manifest, walk_files
+
+CACHE_PATH = os.path.join(".cache", "image-sizes.json")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+HEADER_BYTES = 32
+# JPEG start-of-frame markers; C4, C8 and CC are other segments
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def probe(path):
+    # Returns (width, height) read from the file header, or None if the
+    # format isn't recognized or the header is cut short or corrupt. Only
+    # reads as far as the dimensions.
+    try:
+        return probe_header(path)
+    except (struct.error, IndexError):
+        return None
+
+def probe_header(path):
+    with open(path, "rb") as f:
+        head = f.read(HEADER_BYTES)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return probe_webp(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return probe_jpeg(f)
+    return None
+
+def probe_webp(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+def probe_jpeg(f):
+    # Walk the segment headers, seeking over each segment's payload, until
+    # the start-of-frame segment that carries the dimensions
+    while True:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in (0xD9, 0xDA):
+            # end of image / start of scan without a frame header
+            return None
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            continue
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H", header)[0]
+        if length < 2:
+            # the length counts its own two bytes; less would never advance
+            return None
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+class ImageSizeCache:
+    # Probe results keyed by path, reused while the file's mtime and size
+    # are unchanged
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.probes = 0
+        self._changed = False
+        try:
+            with open(path) as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def size_of(self, file_path, st=None):
+        if st is None:
+            st = os.stat(file_path)
+        entry = self._entries.get(file_path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return tuple(entry[2]) if entry[2] else None
+        self.probes += 1
+        size = probe(file_path)
+        self._entries[file_path] = [st.st_mtime_ns, st.st_size, list(size) if size else None]
+        self._changed = True
+        return size
+
+    def save(self):
+        if self._changed:
+            save_manifest(self.path, self._entries)
+            self._changed = False
+
+def image_sizes(static_dir, cache):
+    # {"/images/a.png": (width, height)} for every image under static_dir
+    sizes = {}
+    if not os.path.isdir(static_dir):
+        return sizes
+    for rel_path, st in walk_files(static_dir):
+        if rel_path.lower().endswith(IMAGE_EXTENSIONS):
+            size = cache.size_of(os.path.join(static_dir, rel_path), st)
+            if size:
+                sizes["/" + rel_path.replace(os.sep, "/")] = size
+    cache.save()
+    return sizes
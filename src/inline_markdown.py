@@ -1,6 +1,16 @@
 from textnode import TextNode, TextType
 import re
 
+# Neither the text nor the URL may run past a bracket or parenthesis that
+# could start another match (URLs may hold one level of balanced parens, as
+# in wiki links). Otherwise every "[" in a run of unclosed ones rescans the
+# rest of the text and the split goes quadratic.
+_IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(((?:[^()]|\([^()]*\))+)\)")
+_LINK_RE = re.compile(r"\[([^\[\]]+)\]\(((?:[^()]|\([^()]*\))+)\)")
+_DELIMITER_RE = re.compile(r"\*\*|[_`]")
+_DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+_DELIMITER_RANKS = {"**": 0, "_": 1, "`": 2}
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for node in old_nodes:
@@ -21,48 +31,31 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def extract_markdown_images(text):
-    matches = re.findall(r"!\[([^\]]*)\]\(([^)]+)\)", text)
+    matches = _IMAGE_RE.findall(text)
     return matches
 
 def extract_markdown_links(text):
-    matches = re.findall(r"\[([^\]]+)\]\(([^)]+)\)", text)
+    matches = _LINK_RE.findall(text)
     return matches
 
+def extract_markdown_urls(text):
+    # [("image" or "link", url)] for the images in text, then the links
+    urls = [("image", url) for _, url in _IMAGE_RE.findall(text)]
+    # images match the link pattern too, so they're blanked out first
+    text = _IMAGE_RE.sub(_blank, text)
+    urls.extend(("link", url) for _, url in _LINK_RE.findall(text))
+    return urls
+
+def _blank(match):
+    return " " * len(match.group())
+
 def split_nodes_image(old_nodes):
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-
-        text = node.text
-        matches = extract_markdown_images(text)
-
-        if not matches:
-            new_nodes.append(node)
-            continue
-
-        pos = 0
-        for alt, url in matches:
-            pattern = f"![{alt}]({url})"
-            idx = text.find(pattern, pos)
-
-            # Add text before the image
-            before = text[pos:idx]
-            new_nodes.append(TextNode(before, TextType.TEXT))
-
-            # Add the image node
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-
-            # Move position to end of this match
-            pos = idx + len(pattern)
-
-        # Add any remaining text after the last image
-        if pos < len(text):
-            after = text[pos:]
-            if after:
-                new_nodes.append(TextNode(after, TextType.TEXT))
-
+        _split_markup(node.text, _IMAGE_RE, TextType.IMAGE, new_nodes, _append_text)
     return new_nodes
 
 
@@ -72,41 +65,59 @@ def split_nodes_link(old_nodes):
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-
-        text = node.text
-        matches = extract_markdown_links(text)
-
-        if not matches:
-            new_nodes.append(node)
-            continue
-
-        pos = 0
-        for anchor, url in matches:
-            pattern = f"[{anchor}]({url})"
-            idx = text.find(pattern, pos)
-
-            # Text before the link
-            before = text[pos:idx]
-            new_nodes.append(TextNode(before, TextType.TEXT))
-
-            # The link node
-            new_nodes.append(TextNode(anchor, TextType.LINK, url))
-
-            pos = idx + len(pattern)
-
-        # Any trailing text
-        if pos < len(text):
-            after = text[pos:]
-            if after:
-                new_nodes.append(TextNode(after, TextType.TEXT))
-
+        _split_markup(node.text, _LINK_RE, TextType.LINK, new_nodes, _append_text)
     return new_nodes
 
+def _append_text(text, nodes):
+    nodes.append(TextNode(text, TextType.TEXT))
+
+def _split_links(text, nodes):
+    _split_markup(text, _LINK_RE, TextType.LINK, nodes, _append_text)
+
+def _split_images_and_links(text, nodes):
+    # fast path: neither images nor links can appear without a "["
+    if "[" not in text:
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+    _split_markup(text, _IMAGE_RE, TextType.IMAGE, nodes, _split_links)
+
+def _split_markup(text, pattern, text_type, nodes, emit_text):
+    pos = 0
+    for match in pattern.finditer(text):
+        # Text before the match is always emitted, even when empty
+        emit_text(text[pos:match.start()], nodes)
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        pos = match.end()
+
+    if pos == 0:
+        # No matches, the text passes through untouched
+        emit_text(text, nodes)
+    elif pos < len(text):
+        emit_text(text[pos:], nodes)
+
 def text_to_text_nodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
\ No newline at end of file
+    # Walks the text once. "**" outranks "_", which outranks "`": delimiters
+    # inside a higher-ranked span are literal, and a higher-ranked delimiter
+    # inside a lower-ranked span is the unbalanced input that the chained
+    # split_nodes_delimiter passes reject.
+    nodes = []
+    open_delimiter = None
+    start = 0
+    for match in _DELIMITER_RE.finditer(text):
+        delimiter = match.group()
+        if open_delimiter is None:
+            _split_images_and_links(text[start:match.start()], nodes)
+            open_delimiter = delimiter
+            start = match.end()
+        elif delimiter == open_delimiter:
+            text_type = _DELIMITER_TYPES[delimiter]
+            nodes.append(TextNode(text[start:match.start()], text_type))
+            open_delimiter = None
+            start = match.end()
+        elif _DELIMITER_RANKS[delimiter] < _DELIMITER_RANKS[open_delimiter]:
+            raise Exception("Invalid Markdown syntax")
+
+    if open_delimiter is not None:
+        raise Exception("Invalid Markdown syntax")
+    _split_images_and_links(text[start:], nodes)
+    return nodes
@@ -0,0 +1,141 @@
+import json
+import os
+import posixpath
+import re
+from urllib.parse import unquote, urlsplit
+from block_markdown import fence_open_after
+from copystatic import save_manifest, walk_files
+from gencontent import find_markdown_files, output_path
+from inline_markdown import extract_markdown_urls
+
+INDEX_PATH = os.path.join(".cache", "link-index.json")
+
+_CODE_SPAN_RE = re.compile(r"`[^`]*`")
+
+def extract_links(markdown):
+    # [(line number, "link" or "image", url)] for the links the renderer will
+    # produce: nothing inside ``` fences or `code` spans counts
+    links = []
+    in_fence = False
+    for number, line in enumerate(markdown.split("\n"), 1):
+        stripped = line.strip()
+        # fences open and close exactly where the renderer's blocks do
+        if in_fence or stripped.startswith("```"):
+            in_fence = fence_open_after(stripped, in_fence)
+            continue
+        if "[" not in line:
+            continue
+        if "`" in line:
+            line = _CODE_SPAN_RE.sub(blank, line)
+        links.extend((number, kind, url) for kind, url in extract_markdown_urls(line))
+    return links
+
+def blank(match):
+    return " " * len(match.group())
+
+def resolve(url, page_url):
+    # The root-relative path an internal URL points at, or None for external
+    # URLs (http:, mailto:, //host) and same-page #fragments
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page_url), path)
+    trailing = path.endswith("/")
+    path = posixpath.normpath(path)
+    if trailing and path != "/":
+        path += "/"
+    return path
+
+def target_exists(path, targets):
+    if path.endswith("/"):
+        return path + "index.html" in targets
+    return path in targets or path + "/index.html" in targets or path + ".html" in targets
+
+def site_targets(content_dir, static_dir):
+    # every root-relative URL the built site will serve
+    targets = set()
+    for rel_path in find_markdown_files(content_dir):
+        targets.add("/" + output_path(rel_path).replace(os.sep, "/"))
+    if os.path.isdir(static_dir):
+        for rel_path, _ in walk_files(static_dir):
+            targets.add("/" + rel_path.replace(os.sep, "/"))
+    return targets
+
+class LinkIndex:
+    # The internal links of every page, keyed by its markdown path. A page is
+    # only rescanned when its mtime or size changes, so a rebuild costs a stat
+    # per page plus a set lookup per link. With no path it's kept in memory.
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.scans = 0
+        self._changed = False
+        self._entries = {}
+        if path is not None:
+            try:
+                with open(path) as f:
+                    self._entries = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    def links(self, source, page_url, st=None):
+        if st is None:
+            st = os.stat(source)
+        entry = self._entries.get(source)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size and entry[2] == page_url:
+            return entry[3]
+        self.scans += 1
+        with open(source) as f:
+            links = []
+            for number, kind, url in extract_links(f.read()):
+                path = resolve(url, page_url)
+                if path is not None:
+                    links.append([number, kind, url, path])
+        self._entries[source] = [st.st_mtime_ns, st.st_size, page_url, links]
+        self._changed = True
+        return links
+
+    def remove(self, source):
+        if self._entries.pop(source, None) is not None:
+            self._changed = True
+
+    def prune(self, sources):
+        for source in set(self._entries) - set(sources):
+            self.remove(source)
+
+    def save(self):
+        if self._changed and self.path is not None:
+            save_manifest(self.path, self._entries)
+            self._changed = False
+
+def broken_links(pages, targets, index):
+    # pages is [(markdown path, page URL)]; returns [(path, line, kind, url)]
+    broken = []
+    for source, page_url in pages:
+        for number, kind, url, path in index.links(source, page_url):
+            if not target_exists(path, targets):
+                broken.append((source, number, kind, url))
+    return broken
+
+def check_links(content_dir="content", static_dir="static", index=None):
+    if index is None:
+        index = LinkIndex()
+    pages = [
+        (os.path.join(content_dir, rel_path), "/" + output_path(rel_path).replace(os.sep, "/"))
+        for rel_path in find_markdown_files(content_dir)
+    ]
+    index.prune(source for source, _ in pages)
+    broken = broken_links(pages, site_targets(content_dir, static_dir), index)
+    index.save()
+    report_broken(broken)
+    return broken
+
+def report_broken(broken):
+    for source, number, kind, url in broken:
+        print(f"{source}:{number}: broken {kind} {url}")
+    if broken:
+        print(f"Found {len(broken)} broken links")
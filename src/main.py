@@ -1,33 +1,164 @@
+import argparse
+import cProfile
 import os
-import shutil
-
-def copy_static_to_public():
-    src = "static"
-    dst = "public"
-    if os.path.exists(dst):
-        print(f"Deleting existing destination: {dst}")
-        shutil.rmtree(dst)
-    os.mkdir(dst)
-    print(f"Created directory: {dst}")
-
-    def recursive_copy(src_dir, dst_dir):
-        for item in os.listdir(src_dir):
-            src_path = os.path.join(src_dir, item)
-            dst_path = os.path.join(dst_dir, item)
-
-            if os.path.isfile(src_path):
-                shutil.copy(src_path, dst_path)
-                print(f"Copied file: {src_path} -> {dst_path}")
-            elif os.path.isdir(src_path):
-                os.mkdir(dst_path)
-                print(f"Created directory: {dst_path}")
-                recursive_copy(src_path, dst_path)
-
-    recursive_copy(src, dst)
+from buildcache import BuildCache
+from compress import MANIFEST_PATH as COMPRESS_MANIFEST_PATH, MIN_SIZE, compress_public, remove_compressed
+from copystatic import LINK_MODES, MANIFEST_PATH, copy_static_to_public
+from fingerprint import asset_urls
+from imagesize import ImageSizeCache, image_sizes
+from linkcheck import check_links
+from gencontent import BLOCK_CACHE_PATH, HIGHLIGHT_CACHE_PATH, generate_pages
+from highlight import DEFAULT_THEME, Highlighter, set_highlighter
+from profiler import profiler
+from publish import KEEP_GENERATIONS, Generations
+from search import INDEX_PATH as SEARCH_INDEX_PATH, build_search_index
+from serve import DEFAULT_PORT, Renderer, serve_render
+from textnode import set_image_attributes
+from watch import Site, watch
 
 def main():
-    copy_static_to_public()
+    parser = argparse.ArgumentParser(description="Build the static site into public/")
+    parser.add_argument("--clean", action="store_true", help="delete public/ and copy every static file again")
+    parser.add_argument("--hash", action="store_true", help="compare file contents when size matches but mtime changed")
+    parser.add_argument("--copy-threads", type=int, default=None, help="number of threads copying static files")
+    parser.add_argument("--link", choices=LINK_MODES, default="copy", help="hardlink or reflink static files instead of copying bytes")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of processes generating pages (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="re-render every page instead of reusing cached output")
+    parser.add_argument("--cache-size", type=int, default=256, help="maximum size of the page cache in MB")
+    parser.add_argument("--fingerprint", action="store_true", help="name static files after their content hash and rewrite references to them")
+    parser.add_argument("--eager-image", action="append", default=[], metavar="PATTERN", help="image URL pattern to load eagerly, e.g. /images/hero-*")
+    parser.add_argument("--highlight-theme", default=DEFAULT_THEME, help="color theme for code blocks tagged with a language")
+    parser.add_argument("--no-highlight", action="store_true", help="leave code blocks unhighlighted")
+    parser.add_argument("--no-pygments", action="store_true", help="use the built-in lexers even if Pygments is installed")
+    parser.add_argument("--compress", action="store_true", help="write .gz (and .zst/.br if available) sidecars for text files in public/")
+    parser.add_argument("--compress-min-size", type=int, default=MIN_SIZE, help="smallest file to compress, in bytes")
+    parser.add_argument("--no-search", action="store_true", help="don't write the client-side search index to public/search/")
+    parser.add_argument("--no-link-check", action="store_true", help="don't report broken internal links and images")
+    parser.add_argument("--keep-generations", type=int, default=KEEP_GENERATIONS, help="number of published builds to keep for rollback")
+    parser.add_argument("--rollback", action="store_true", help="publish the previous build again and exit")
+    parser.add_argument("--watch", action="store_true", help="after building, rebuild outputs as their sources change")
+    parser.add_argument("--poll", action="store_true", help="watch by polling instead of inotify")
+    parser.add_argument("--serve-render", action="store_true", help="don't build; keep a warm renderer answering POST /render with HTML")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="localhost port for --serve-render")
+    parser.add_argument("--socket", metavar="PATH", help="serve --serve-render on a Unix socket instead of a port")
+    parser.add_argument("--profile", nargs="?", const="build-profile.json", metavar="PATH", help="time each stage and page and write a JSON report (pages are rendered in-process)")
+    parser.add_argument("--cprofile", metavar="PATH", help="write cProfile stats for the build, for snakeviz, flameprof, etc.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every copied file")
+    args = parser.parse_args()
+    if args.watch and args.fingerprint:
+        # watch mode copies static files under their own names and can't
+        # rename them, or rewrite references, as they change
+        parser.error("--watch can't be combined with --fingerprint")
+
+    if args.serve_render:
+        renderer = Renderer(
+            "template.html",
+            image_sizes=image_sizes("static", ImageSizeCache()),
+            eager_images=args.eager_image,
+            highlight_theme=None if args.no_highlight else args.highlight_theme,
+            use_pygments=not args.no_pygments,
+        )
+        serve_render(renderer, port=args.port, socket_path=args.socket, verbose=args.verbose)
+        return
+
+    generations = Generations("public", keep=args.keep_generations)
+    if args.rollback:
+        print(f"Published {generations.rollback()}")
+        forget_output_state()
+        return
+
+    jobs = args.jobs
+    if args.profile:
+        profiler.enable()
+        # per-page timings have to be collected in this process
+        jobs = 1
+    cprofile = None
+    if args.cprofile:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    # everything is built into a new generation and only published once it's
+    # complete; public/ keeps serving the last good build until then
+    staged = generations.stage(seed=not args.clean)
+    try:
+        with profiler.stage("copy_static"):
+            static = copy_static_to_public(
+                dst=staged,
+                incremental=not args.clean,
+                use_hash=args.hash,
+                threads=args.copy_threads,
+                link_mode=args.link,
+                verbose=args.verbose,
+                fingerprint=args.fingerprint,
+            )
+        cache = None
+        block_cache_path = None
+        highlight_cache_path = None
+        if not args.no_cache:
+            cache = BuildCache(max_bytes=args.cache_size * 1024 * 1024)
+            block_cache_path = BLOCK_CACHE_PATH
+            highlight_cache_path = HIGHLIGHT_CACHE_PATH
+        with profiler.stage("image_sizes"):
+            sizes = image_sizes("static", ImageSizeCache())
+        with profiler.stage("generate_pages"):
+            generate_pages(
+                "content",
+                "template.html",
+                staged,
+                jobs=jobs,
+                cache=cache,
+                block_cache_path=block_cache_path,
+                asset_urls=asset_urls(static.assets) if args.fingerprint else None,
+                image_sizes=sizes,
+                eager_images=args.eager_image,
+                highlight_theme=None if args.no_highlight else args.highlight_theme,
+                use_pygments=not args.no_pygments,
+                highlight_cache_path=highlight_cache_path,
+            )
+
+        if not args.no_search:
+            with profiler.stage("search_index"):
+                build_search_index("content", staged)
+
+        if not args.no_link_check:
+            with profiler.stage("check_links"):
+                check_links("content", "static")
+
+        if args.compress:
+            with profiler.stage("compress"):
+                compress_public(staged, jobs=args.jobs, min_size=args.compress_min_size)
+        else:
+            remove_compressed(staged)
+    except BaseException:
+        generations.discard(staged)
+        forget_output_state()
+        raise
+    generations.publish(staged)
+
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.cprofile)
+        print(f"Wrote cProfile stats to {args.cprofile}")
+    if args.profile:
+        profiler.write_report(args.profile)
+        profiler.disable()
+        print(f"Wrote build profile to {args.profile}")
+
+    if args.watch:
+        # page workers configured their own highlighter and image
+        # attributes, this process may not have
+        set_highlighter(None if args.no_highlight else Highlighter(args.highlight_theme, not args.no_pygments))
+        set_image_attributes(sizes, args.eager_image)
+        watch(Site("static", "content", "template.html", "public"), poll=args.poll)
+
+def forget_output_state():
+    # These describe what was written into the generation that was just
+    # discarded or rolled back from, not the published one, so the next
+    # build starts them over: every static file is copied, every page
+    # scanned for search and every file compressed again
+    for path in (MANIFEST_PATH, SEARCH_INDEX_PATH, COMPRESS_MANIFEST_PATH):
+        if os.path.exists(path):
+            os.remove(path)
 
 if __name__ == "__main__":
     main()
-
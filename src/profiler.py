@@ -0,0 +1,173 @@
+import importlib
+import inspect
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# (module, attribute, stage): wrapped with a timer while profiling. Each is
+# patched where it's looked up, e.g. block_markdown's own reference to
+# text_to_text_nodes. Stage times are inclusive, so nested stages overlap;
+# a generator's stage only counts the time spent producing its items.
+# write_file and copy_file mostly run on FileWriter's threads, alongside
+# rendering; queue_write is the time pages spend handing writes over, and
+# wait_for_writes the time the build waits for the last of them.
+INSTRUMENTED = (
+    ("gencontent", "write_markdown_html", "render_markdown"),
+    ("block_markdown", "iter_blocks", "iter_blocks"),
+    ("block_markdown", "BlockCache.render", "block_cache"),
+    ("block_markdown", "block_to_html_node", "block_to_html_node"),
+    ("block_markdown", "text_to_text_nodes", "text_to_text_nodes"),
+    ("htmlnode", "ParentNode.to_html", "to_html"),
+    ("template", "Template.write", "write_template"),
+    ("gencontent", "copy_to", "copy_file"),
+    ("publish", "copy_to", "copy_file"),
+    ("publish", "write_file", "write_file"),
+    ("publish", "FileWriter.write", "queue_write"),
+    ("publish", "FileWriter.copy", "queue_write"),
+    ("publish", "FileWriter.close", "wait_for_writes"),
+    ("gencontent", "generate_page", "generate_page"),
+)
+# classes whose instances are counted
+COUNTED = (("htmlnode", "HTMLNode"), ("textnode", "TextNode"))
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.stages = defaultdict(lambda: [0.0, 0])
+        self.pages = []
+        self.nodes = defaultdict(int)
+        self._originals = []
+        # writes are timed on FileWriter's threads too
+        self._lock = threading.Lock()
+
+    def enable(self):
+        # Nothing is wrapped until now, so an unprofiled build runs the
+        # original functions with no overhead at all
+        if self.enabled:
+            return
+        self.enabled = True
+        for module_name, attribute, stage in INSTRUMENTED:
+            owner, name = resolve(module_name, attribute)
+            original = getattr(owner, name)
+            if name == "generate_page":
+                wrapper = self.page_timer(original)
+            elif inspect.isgeneratorfunction(original):
+                wrapper = self.generator_timer(original, stage)
+            else:
+                wrapper = self.timer(original, stage)
+            self.patch(owner, name, wrapper)
+        for module_name, class_name in COUNTED:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            self.patch(cls, "__init__", self.counter(cls.__init__))
+
+    def disable(self):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+        self.enabled = False
+
+    def patch(self, owner, name, wrapper):
+        self._originals.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, wrapper)
+
+    def timer(self, func, stage):
+        totals = self.stages[stage]
+        lock = self._lock
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with lock:
+                    totals[0] += elapsed
+                    totals[1] += 1
+
+        return timed
+
+    def generator_timer(self, func, stage):
+        # one call per generator, timed only while it's working on an item
+        totals = self.stages[stage]
+        lock = self._lock
+
+        def timed(*args, **kwargs):
+            items = func(*args, **kwargs)
+            with lock:
+                totals[1] += 1
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        totals[0] += elapsed
+                yield item
+
+        return timed
+
+    def page_timer(self, func):
+        totals = self.stages["generate_page"]
+
+        def timed(from_path, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(from_path, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                totals[0] += elapsed
+                totals[1] += 1
+                self.pages.append((elapsed, from_path))
+
+        return timed
+
+    def counter(self, init):
+        nodes = self.nodes
+
+        def counted(node, *args, **kwargs):
+            nodes[type(node).__name__] += 1
+            init(node, *args, **kwargs)
+
+        return counted
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            totals = self.stages[name]
+            totals[0] += time.perf_counter() - start
+            totals[1] += 1
+
+    def report(self, top=20):
+        slowest = sorted(self.pages, reverse=True)[:top]
+        return {
+            "stages": {name: {"seconds": round(seconds, 6), "calls": calls} for name, (seconds, calls) in sorted(self.stages.items())},
+            "nodes": dict(sorted(self.nodes.items())),
+            "pages": len(self.pages),
+            "slowest_pages": [{"path": path, "seconds": round(seconds, 6)} for seconds, path in slowest],
+        }
+
+    def write_report(self, path, top=20):
+        report = self.report(top)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+def resolve(module_name, attribute):
+    owner = importlib.import_module(module_name)
+    *path, name = attribute.split(".")
+    for part in path:
+        owner = getattr(owner, part)
+    return owner, name
+
+profiler = Profiler()
@@ -0,0 +1,164 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from copystatic import UNSUPPORTED_ERRNOS, walk_files
+
+KEEP_GENERATIONS = 2
+
+class Generations:
+    # Builds go into a fresh directory next to `dest`, and `dest` itself is a
+    # symlink to the published one. Publishing (or rolling back) replaces the
+    # symlink with a single rename, so it takes the same time however big the
+    # site is and the web server never sees a partial build. The newest
+    # `keep` generations up to the published one are kept around.
+    def __init__(self, dest="public", keep=KEEP_GENERATIONS):
+        self.dest = dest.rstrip(os.sep)
+        self.keep = max(1, keep)
+        parent, name = os.path.split(os.path.abspath(self.dest))
+        self.root = os.path.join(os.path.realpath(parent), f".{name}.generations")
+
+    def generations(self):
+        # oldest first
+        try:
+            names = [name for name in os.listdir(self.root) if name.isdigit()]
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.root, name) for name in sorted(names, key=int)]
+
+    def current(self):
+        if not os.path.islink(self.dest):
+            return None
+        return os.path.realpath(self.dest)
+
+    def stage(self, seed=True):
+        # A new generation directory, seeded with hardlinks to the published
+        # files so incremental steps only write what changed. Writers must
+        # replace files rather than write into them, or they'd change the
+        # published copy as well.
+        self.adopt()
+        generations = self.generations()
+        number = int(os.path.basename(generations[-1])) + 1 if generations else 1
+        staged = os.path.join(self.root, f"{number:06d}")
+        os.makedirs(staged)
+        current = self.current()
+        if seed and current is not None:
+            link_tree(current, staged)
+        return staged
+
+    def adopt(self):
+        # A plain directory from before staged builds becomes the first
+        # generation; this is the only step that isn't atomic
+        if os.path.islink(self.dest) or not os.path.isdir(self.dest):
+            return
+        os.makedirs(self.root, exist_ok=True)
+        generations = self.generations()
+        number = int(os.path.basename(generations[-1])) + 1 if generations else 1
+        adopted = os.path.join(self.root, f"{number:06d}")
+        os.rename(self.dest, adopted)
+        self.swap(adopted)
+
+    def publish(self, staged):
+        self.swap(staged)
+        self.prune()
+
+    def discard(self, staged):
+        shutil.rmtree(staged, ignore_errors=True)
+
+    def rollback(self):
+        # Publishes the generation before the current one. The one rolled
+        # back from is deleted, so it can't come back through a later prune.
+        generations = self.generations()
+        current = self.current()
+        if current not in generations:
+            raise ValueError(f"{self.dest} is not a published generation")
+        index = generations.index(current)
+        if index == 0:
+            raise ValueError(f"No earlier generation of {self.dest} to roll back to")
+        self.swap(generations[index - 1])
+        for path in generations[index:]:
+            shutil.rmtree(path, ignore_errors=True)
+        return generations[index - 1]
+
+    def swap(self, target):
+        link = f"{self.dest}.{os.getpid()}.tmp"
+        os.symlink(os.path.relpath(target, os.path.dirname(os.path.abspath(self.dest))), link)
+        os.replace(link, self.dest)
+
+    def prune(self):
+        generations = self.generations()
+        current = self.current()
+        if current not in generations:
+            return
+        index = generations.index(current)
+        kept = set(generations[max(0, index - self.keep + 1):index + 1])
+        for path in generations:
+            if path not in kept:
+                shutil.rmtree(path, ignore_errors=True)
+
+def link_tree(src, dst):
+    for rel_path, _ in walk_files(src):
+        dst_path = os.path.join(dst, rel_path)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        try:
+            os.link(os.path.join(src, rel_path), dst_path)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            shutil.copy2(os.path.join(src, rel_path), dst_path)
+
+def write_file(path, data):
+    # Written under a temporary name and renamed into place, so readers see
+    # the old file or the new one, and a hardlinked old file is left alone
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def copy_to(src_path, path):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(src_path, tmp_path)
+    os.replace(tmp_path, path)
+
+class FileWriter:
+    # Writes files on a small thread pool so rendering doesn't wait on the
+    # disk. At most max_pending writes are queued, which bounds the memory
+    # held by rendered pages. close() waits for them and raises the first
+    # error any of them hit.
+    def __init__(self, threads=4, max_pending=64):
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._error = None
+
+    def write(self, path, data):
+        self._submit(write_file, path, data)
+
+    def copy(self, src_path, path):
+        self._submit(copy_to, src_path, path)
+
+    def _submit(self, func, *args):
+        if self._error is not None:
+            raise self._error
+        self._pending.acquire()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self._pending.release()
+        if future.exception() is not None and self._error is None:
+            self._error = future.exception()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,157 @@
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from block_markdown import BlockType, classify_lines, is_code, is_heading, iter_blocks
+from copystatic import save_manifest
+from gencontent import extract_title, find_markdown_files, output_path
+from inline_markdown import text_to_text_nodes
+from publish import write_file
+
+INDEX_PATH = os.path.join(".cache", "search-index.json")
+SEARCH_DIR = "search"
+PREFIX_LENGTH = 2
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just me more most my
+myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with you your
+yours yourself yourselves
+""".split())
+
+def page_text(markdown):
+    # The text a reader sees, taken from the same block and inline parsing
+    # the renderer does. Code blocks aren't indexed.
+    parts = []
+    for block in iter_blocks(markdown.split("\n")):
+        if is_code(block):
+            continue
+        if is_heading(block):
+            texts = [block.split(" ", 1)[1]]
+        else:
+            block_type, items = classify_lines(block.split("\n"))
+            if block_type in (BlockType.PARAGRAPH, BlockType.QUOTE):
+                texts = [" ".join(items)]
+            else:
+                texts = items
+        for text in texts:
+            parts.extend(node.text for node in text_to_text_nodes(text) if node.text)
+    return " ".join(parts)
+
+def tokenize(text):
+    return [word for word in _WORD_RE.findall(text.lower()) if len(word) > 1 and word not in STOP_WORDS]
+
+def shard_name(term):
+    return term[:PREFIX_LENGTH]
+
+class SearchIndex:
+    # Term counts for every page, keyed by markdown path and reused while the
+    # page's mtime and size are unchanged. Each page keeps its document id
+    # for as long as it exists, so a changed page only dirties the shards of
+    # the terms it gained or lost. With no path it's kept in memory.
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.scans = 0
+        self._changed = False
+        self._pages = {}
+        if path is not None:
+            try:
+                with open(path) as f:
+                    self._pages = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+    def __len__(self):
+        return len(self._pages)
+
+    def update(self, pages, dest_dir):
+        # pages is [(markdown path, page URL)]. Writes the document table and
+        # every shard that changed (or is missing) under dest_dir/search, and
+        # returns the number of shards written.
+        dirty = set()
+        docs_changed = False
+        sources = {source for source, _ in pages}
+        for source in list(self._pages):
+            if source not in sources:
+                dirty.update(shard_name(term) for term in self._pages.pop(source)[5])
+                docs_changed = self._changed = True
+
+        used_ids = {entry[4] for entry in self._pages.values()}
+        free_ids = (doc_id for doc_id in range(len(self._pages) + len(pages) + 1) if doc_id not in used_ids)
+        for source, url in pages:
+            st = os.stat(source)
+            entry = self._pages.get(source)
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size and entry[2] == url:
+                continue
+            self.scans += 1
+            with open(source) as f:
+                markdown = f.read()
+            terms = dict(Counter(tokenize(page_text(markdown))))
+            title = extract_title(markdown)
+            if entry is None:
+                doc_id = next(free_ids)
+                old_terms = {}
+            else:
+                doc_id = entry[4]
+                old_terms = entry[5]
+            self._pages[source] = [st.st_mtime_ns, st.st_size, url, title, doc_id, terms]
+            self._changed = True
+            if entry is None or entry[2:4] != [url, title]:
+                docs_changed = True
+            # a term whose count changed rewrites its shard, unchanged ones don't
+            for term in old_terms.keys() | terms.keys():
+                if old_terms.get(term) != terms.get(term):
+                    dirty.add(shard_name(term))
+
+        search_dir = os.path.join(dest_dir, SEARCH_DIR)
+        docs_path = os.path.join(search_dir, "docs.json")
+        if not dirty and not docs_changed and os.path.exists(docs_path):
+            return 0
+        os.makedirs(search_dir, exist_ok=True)
+        shards = defaultdict(lambda: defaultdict(list))
+        for entry in self._pages.values():
+            for term, count in entry[5].items():
+                shards[shard_name(term)][term].append([entry[4], count])
+
+        if docs_changed or not os.path.exists(docs_path):
+            docs = [None] * (max((entry[4] for entry in self._pages.values()), default=-1) + 1)
+            for entry in self._pages.values():
+                docs[entry[4]] = [entry[2], entry[3]]
+            write_file(docs_path, json.dumps(docs, separators=(",", ":")))
+
+        written = 0
+        existing = set(os.listdir(search_dir))
+        for name in sorted(existing - {"docs.json"}):
+            # shards left with no terms
+            if name.endswith(".json") and name[:-5] not in shards:
+                os.remove(os.path.join(search_dir, name))
+        for name, postings in shards.items():
+            file_name = f"{name}.json"
+            if name not in dirty and file_name in existing:
+                continue
+            data = {term: sorted(postings[term]) for term in sorted(postings)}
+            write_file(os.path.join(search_dir, file_name), json.dumps(data, separators=(",", ":")))
+            written += 1
+        return written
+
+    def save(self):
+        if self._changed and self.path is not None:
+            save_manifest(self.path, self._pages)
+            self._changed = False
+
+def build_search_index(content_dir="content", dest_dir="public", index=None):
+    if index is None:
+        index = SearchIndex()
+    pages = [
+        (os.path.join(content_dir, rel_path), "/" + output_path(rel_path).replace(os.sep, "/"))
+        for rel_path in find_markdown_files(content_dir)
+    ]
+    written = index.update(pages, dest_dir)
+    index.save()
+    print(f"Search index: {len(index)} pages, {index.scans} scanned, {written} shards written")
+    return written
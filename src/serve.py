@@ -0,0 +1,237 @@
+import json
+import math
+import os
+import socketserver
+import stat
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from block_markdown import BlockCache, markdown_to_html_node
+from gencontent import extract_title
+from highlight import DEFAULT_THEME, Highlighter, get_highlighter, set_highlighter
+from htmlnode import escape
+from template import load_template
+from textnode import set_image_attributes
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+class LatencyStats:
+    # Server-side time for the most recent `max_samples` requests
+    def __init__(self, max_samples=10000):
+        self.requests = 0
+        self.errors = 0
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += error
+            self._samples.append(seconds)
+
+    def percentile(self, fraction):
+        # nearest rank, in milliseconds
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples), max(1, math.ceil(fraction * len(samples)))) - 1
+        return samples[index] * 1000
+
+    def summary(self):
+        p50 = self.percentile(0.5)
+        p99 = self.percentile(0.99)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": None if p50 is None else round(p50, 3),
+            "p99_ms": None if p99 is None else round(p99, 3),
+        }
+
+class Renderer:
+    # Everything a render needs, kept warm between requests: the compiled
+    # template (reloaded only when a file it was built from changes), the
+    # block cache and the highlighter's cache. Neither cache is thread-safe,
+    # and rendering holds the GIL anyway, so renders take turns.
+    def __init__(
+        self,
+        template_path="template.html",
+        max_blocks=10000,
+        image_sizes=None,
+        eager_images=(),
+        highlight_theme=DEFAULT_THEME,
+        use_pygments=True,
+    ):
+        self.template_path = template_path
+        self.block_cache = BlockCache(max_entries=max_blocks)
+        self.stats = LatencyStats()
+        self._lock = threading.Lock()
+        set_image_attributes(image_sizes, eager_images)
+        set_highlighter(None if highlight_theme is None else Highlighter(highlight_theme, use_pygments))
+        # imports and lazily compiled regexes are paid for here rather than
+        # by the first request
+        self.render("# Warm up\n\nSome *text* with a [link](/) and `code`.\n\n- item\n\n```python\nx = 1\n```")
+        self.block_cache.hits = self.block_cache.misses = 0
+
+    def render(self, markdown, fragment=False):
+        with self._lock:
+            content = markdown_to_html_node(markdown, self.block_cache).to_html()
+            if fragment:
+                return content
+            template = load_template(self.template_path)
+            try:
+                title = escape(extract_title(markdown))
+            except Exception:
+                # a draft without a title still previews
+                title = ""
+            return template.render({"Title": title, "Content": content})
+
+    def summary(self):
+        summary = self.stats.summary()
+        summary["block_cache"] = {"entries": len(self.block_cache), "hits": self.block_cache.hits, "misses": self.block_cache.misses}
+        highlighter = get_highlighter()
+        if highlighter is not None:
+            summary["highlight_cache"] = {"entries": len(highlighter), "hits": highlighter.hits, "misses": highlighter.misses}
+        return summary
+
+class RenderHandler(BaseHTTPRequestHandler):
+    # POST /render with markdown as the body returns the page, or just the
+    # content with ?fragment=1. GET /stats returns latency percentiles and
+    # cache counts. Connections are kept alive, so a client pays for the
+    # connection once; with Nagle's algorithm on, the body would wait for
+    # the client's delayed ACK of the headers, about 40 ms.
+    protocol_version = "HTTP/1.1"
+    verbose = False
+
+    def setup(self):
+        # TCP only, a Unix socket has no TCP_NODELAY
+        self.disable_nagle_algorithm = isinstance(self.client_address, tuple)
+        super().setup()
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self.respond(404, "text/plain", "Not found\n")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            # the body can't be skipped reliably, so the connection goes too
+            self.close_connection = True
+            if length < 0:
+                self.respond(400, "text/plain", "Invalid Content-Length\n")
+            else:
+                self.respond(413, "text/plain", "Markdown too large\n")
+            return
+        body = self.rfile.read(length)
+        fragment = parse_qs(url.query).get("fragment", ["0"])[0] not in ("", "0")
+        try:
+            html = self.server.renderer.render(body.decode("utf-8"), fragment)
+        except Exception as e:
+            self.server.renderer.stats.record(time.perf_counter() - start, error=True)
+            self.respond(400, "text/plain", f"{e}\n")
+            return
+        # recorded before responding, so a client that reads /stats next
+        # sees its own request
+        self.server.renderer.stats.record(time.perf_counter() - start)
+        self.respond(200, "text/html; charset=utf-8", html)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/stats":
+            self.respond(404, "text/plain", "Not found\n")
+            return
+        self.respond(200, "application/json", json.dumps(self.server.renderer.summary()) + "\n")
+
+    def respond(self, status, content_type, text):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # a Unix socket's client address is an empty string
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+class RenderHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, renderer):
+        self.renderer = renderer
+        super().__init__(address, RenderHandler)
+
+class RenderUnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, renderer):
+        self.renderer = renderer
+        # a socket left behind by a previous run would make bind fail, but
+        # anything else at the path is left alone
+        if remove_socket(path) is False:
+            raise FileExistsError(f"Not a socket, refusing to replace it: {path}")
+        super().__init__(path, RenderHandler)
+
+    def server_close(self):
+        super().server_close()
+        remove_socket(self.server_address)
+
+def remove_socket(path):
+    # True if a socket was removed, False if something else is there, None
+    # if nothing is
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISSOCK(mode):
+        return False
+    os.remove(path)
+    return True
+
+def make_server(renderer, port=DEFAULT_PORT, socket_path=None):
+    # localhost only: the daemon renders whatever it's sent
+    if socket_path is not None:
+        return RenderUnixServer(socket_path, renderer)
+    return RenderHTTPServer(("127.0.0.1", port), renderer)
+
+def serve_render(renderer, port=DEFAULT_PORT, socket_path=None, report_seconds=60, verbose=False):
+    RenderHandler.verbose = verbose
+    server = make_server(renderer, port, socket_path)
+    where = socket_path if socket_path is not None else f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Rendering markdown at {where} (POST /render, GET /stats); Ctrl-C to stop")
+
+    stop = threading.Event()
+
+    def report():
+        # a line every report_seconds when there were requests since the last
+        reported = 0
+        while not stop.wait(report_seconds):
+            if renderer.stats.requests != reported:
+                reported = renderer.stats.requests
+                print(format_summary(renderer.stats.summary()))
+
+    reporter = threading.Thread(target=report, daemon=True)
+    reporter.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        print(format_summary(renderer.stats.summary()))
+
+def format_summary(summary):
+    if summary["p50_ms"] is None:
+        return "No requests"
+    return f"{summary['requests']} requests ({summary['errors']} errors): p50 {summary['p50_ms']:.2f} ms, p99 {summary['p99_ms']:.2f} ms"
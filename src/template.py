@@ -0,0 +1,92 @@
+import os
+import re
+from functools import lru_cache
+
+# {{ Name }} is a slot filled in per page; {{> path }} pastes in another
+# template file, resolved relative to the file that includes it
+_TAG_RE = re.compile(r"\{\{\s*(>?)\s*([^{}]+?)\s*\}\}")
+
+# path -> (file stamps, Template), see load_template
+_loaded = {}
+
+class Template:
+    # A template parsed once into (text, slot) segments: literal text has a
+    # slot of None, and a slot's text is its original placeholder, which is
+    # what's emitted when no value is given for it. `files` lists every file
+    # the template was built from, includes too.
+    __slots__ = ("source", "files", "segments", "slots")
+
+    def __init__(self, source, files=()):
+        self.source = source
+        self.files = tuple(files)
+        self.segments = []
+        pos = 0
+        for match in _TAG_RE.finditer(source):
+            if match.group(1):
+                raise ValueError(f"Include outside a template file: {match.group()}")
+            if match.start() > pos:
+                self.segments.append((source[pos:match.start()], None))
+            self.segments.append((match.group(), match.group(2)))
+            pos = match.end()
+        if pos < len(source):
+            self.segments.append((source[pos:], None))
+        self.slots = frozenset(slot for _, slot in self.segments if slot)
+
+    def render(self, values):
+        return "".join(text if slot is None else values.get(slot, text) for text, slot in self.segments)
+
+    def write(self, sink, values):
+        # Like render, but a value with a write_html method (a node tree) is
+        # streamed into the sink instead of being built up as a string
+        for text, slot in self.segments:
+            if slot is not None:
+                value = values.get(slot, text)
+                if hasattr(value, "write_html"):
+                    value.write_html(sink)
+                    continue
+                text = value
+            sink.write(text)
+
+@lru_cache(maxsize=16)
+def compile_template(source):
+    return Template(source)
+
+def load_template(path):
+    # Compiled templates are cached by path and reused until the template or
+    # any file it includes changes size or mtime
+    path = os.path.abspath(path)
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == file_stamps(cached[1].files):
+        return cached[1]
+    files = []
+    source = expand(path, files, ())
+    template = Template(source, files)
+    _loaded[path] = (file_stamps(template.files), template)
+    return template
+
+def expand(path, files, including):
+    if path in including:
+        chain = " -> ".join(including + (path,))
+        raise ValueError(f"Template includes itself: {chain}")
+    with open(path) as f:
+        source = f.read()
+    if path not in files:
+        files.append(path)
+
+    def include(match):
+        if not match.group(1):
+            return match.group()
+        included = os.path.join(os.path.dirname(path), match.group(2))
+        return expand(os.path.abspath(included), files, including + (path,))
+
+    return _TAG_RE.sub(include, source)
+
+def file_stamps(paths):
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamps.append((st.st_mtime_ns, st.st_size))
+    return stamps
@@ -1,5 +1,22 @@
+import io
+import mmap
+import os
+import tempfile
 import unittest
-from block_markdown import BlockType, markdown_to_blocks, block_to_block_type, markdown_to_html_node
+from block_markdown import (
+    BlockCache,
+    BlockType,
+    block_to_block_type,
+    block_to_html_node,
+    handle_ordered_list,
+    handle_paragraph,
+    handle_quote,
+    handle_unordered_list,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    write_markdown_html,
+)
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -76,6 +93,45 @@ class TestMarkdownToBlocks(unittest.TestCase):
             ],
         )
     
+    def test_whitespace_only_line_does_not_split(self):
+        self.assertEqual(markdown_to_blocks("one\n   \ntwo\n\nthree"), ["one\ntwo", "three"])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        self.assertEqual(markdown_to_blocks(md), ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro"])
+        self.assertEqual(
+            markdown_to_html_node(md).children[1].to_html(),
+            "<pre><code>first\n\n\nsecond</code></pre>",
+        )
+
+    def test_single_line_fence_does_not_open(self):
+        self.assertEqual(markdown_to_blocks("```code```\n\nafter"), ["```code```", "after"])
+
+    def test_fence_closes_at_end_of_content_line(self):
+        md = "```\nfunc main(){\n}```\n\nWant to [get](/c) in touch?\n\n# Next"
+        self.assertEqual(markdown_to_blocks(md), ["```\nfunc main(){\n}```", "Want to [get](/c) in touch?", "# Next"])
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '<div><pre><code>func main(){\n}</code></pre><p>Want to <a href="/c">get</a> in touch?</p><h1>Next</h1></div>',
+        )
+
+    def test_iter_blocks_from_file_and_mmap(self):
+        md = "# Title\n\nSome *text*\nmore\n\n```\na\n\nb\n```\n"
+        expected = markdown_to_blocks(md)
+        self.assertEqual(list(iter_blocks(io.StringIO(md))), expected)
+        with tempfile.TemporaryFile() as f:
+            f.write(md.encode())
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.assertEqual(list(iter_blocks(iter(mm.readline, b""))), expected)
+
+    def test_write_markdown_html_matches_node(self):
+        md = "# Title\n\n- one\n- two\n\n> quote"
+        sink = io.StringIO()
+        write_markdown_html(io.StringIO(md), sink)
+        self.assertEqual(sink.getvalue(), markdown_to_html_node(md).to_html())
+        self.assertEqual(markdown_to_html_node(io.StringIO(md)).to_html(), sink.getvalue())
+
     def test_heading(self):
         block = "# This is a heading"
         self.assertEqual(block_to_block_type(block), BlockType.HEADING)
@@ -165,5 +221,72 @@ print("Hello, world!")
         self.assertEqual(len(node.children[0].children), 2)
         self.assertEqual(node.children[0].children[0].tag, "li")
 
+    def test_unordered_list_item_starting_with_bold(self):
+        node = markdown_to_html_node("- **bold** first\n- -5 degrees")
+        self.assertEqual(node.to_html(), "<div><ul><li><b>bold</b> first</li><li>-5 degrees</li></ul></div>")
+
+    def test_mixed_prefixes_are_a_paragraph(self):
+        block = "- item\n> quote\n1. one"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+        self.assertEqual(markdown_to_html_node(block).to_html(), "<div><p>- item > quote 1. one</p></div>")
+
+    def test_fused_builder_matches_handlers(self):
+        blocks = {
+            "> one\n>two": handle_quote,
+            "- a\n- _b_": handle_unordered_list,
+            "1. a\n2. `b`": handle_ordered_list,
+            "plain\ntext": handle_paragraph,
+        }
+        for block, handler in blocks.items():
+            self.assertEqual(block_to_html_node(block).to_html(), handler(block).to_html())
+
+    def test_block_cache_matches_uncached(self):
+        md = "# Heading\n\n> quote **bold**\n\n- one\n- [two](/two)\n\n1. a\n2. b\n\n```\ncode\n```"
+        cache = BlockCache()
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), markdown_to_html_node(md).to_html())
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), markdown_to_html_node(md).to_html())
+        self.assertEqual((cache.hits, cache.misses), (5, 5))
+
+    def test_special_characters_are_escaped(self):
+        md = "A <b> & [link](/a?x=1&y=\"2\")\n\n```\nif a < b && c:\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><p>A &lt;b> &amp; <a href="/a?x=1&amp;y=&quot;2&quot;">link</a></p>'
+            "<pre><code>if a &lt; b &amp;&amp; c:</code></pre></div>",
+        )
+        self.assertEqual(markdown_to_html_node(md, BlockCache()).to_html(), html)
+
+    def test_block_cache_rerenders_only_edited_block(self):
+        paragraphs = [f"Paragraph {i} with **bold** text." for i in range(5000)]
+        cache = BlockCache()
+        markdown_to_html_node("\n\n".join(paragraphs), cache)
+        paragraphs[2500] = "An _edited_ paragraph."
+        cache.hits = cache.misses = 0
+        html = markdown_to_html_node("\n\n".join(paragraphs), cache).to_html()
+        self.assertEqual((cache.hits, cache.misses), (4999, 1))
+        self.assertIn("<p>An <i>edited</i> paragraph.</p>", html)
+
+    def test_block_cache_evicts_least_recently_used(self):
+        cache = BlockCache(max_entries=2)
+        cache.render("one")
+        cache.render("two")
+        cache.render("one")
+        cache.render("three")
+        self.assertEqual(len(cache), 2)
+        cache.render("one")
+        self.assertEqual(cache.hits, 2)
+        cache.render("two")
+        self.assertEqual(cache.misses, 4)
+
+    def test_block_cache_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocks.json")
+            cache = BlockCache(path=path, version="v1")
+            cache.render("Some _text_")
+            cache.save()
+            self.assertEqual(len(BlockCache(path=path, version="v1")), 1)
+            self.assertEqual(len(BlockCache(path=path, version="v2")), 0)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
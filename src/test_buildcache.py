@@ -0,0 +1,50 @@
+import os
+import unittest
+from buildcache import BuildCache, renderer_version
+from fixtures import TempDirTestCase
+
+
+class TestBuildCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = BuildCache(os.path.join(self.tmp.name, "cache"), max_bytes=100, version="v1")
+
+    def test_key_depends_on_every_part(self):
+        key = self.cache.key("# Page", "<html>{{ Content }}</html>")
+        self.assertEqual(key, self.cache.key("# Page", "<html>{{ Content }}</html>"))
+        self.assertNotEqual(key, self.cache.key("# Page", "<main>{{ Content }}</main>"))
+        self.assertNotEqual(key, self.cache.key("# Pag", "e<html>{{ Content }}</html>"))
+        other_version = BuildCache(self.cache.cache_dir, version="v2")
+        self.assertNotEqual(key, other_version.key("# Page", "<html>{{ Content }}</html>"))
+
+    def test_file_key_matches_key_of_contents(self):
+        path = self.write("page.md", "# Page\n\nbody " * 1000)
+        with open(path, "rb") as f:
+            data = f.read()
+        self.assertEqual(self.cache.file_key(path, "template", "salt"), self.cache.key(data, "template", "salt"))
+
+    def test_get_and_put(self):
+        key = self.cache.key("source")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, self.write("page.html", "<p>hi</p>"))
+        with open(self.cache.get(key)) as f:
+            self.assertEqual(f.read(), "<p>hi</p>")
+
+    def test_evict_least_recently_used(self):
+        keys = []
+        for i in range(3):
+            key = self.cache.key(str(i))
+            self.cache.put(key, self.write(f"page{i}.html", "x" * 40))
+            os.utime(self.cache.path(key), ns=(i * 10**9, i * 10**9))
+            keys.append(key)
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_renderer_version_is_stable(self):
+        self.assertEqual(renderer_version(), renderer_version())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import gzip
+import os
+import unittest
+from compress import compress_public, remove_compressed
+from fixtures import TempDirTestCase, quiet
+
+
+class TestCompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = self.root = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, "manifest.json")
+        self.page = self.write("index.html", "<p>hello</p>" * 500)
+        self.css = self.write("css/site.css", "body { color: red; }\n" * 200)
+        self.small = self.write("tiny.html", "<p>hi</p>")
+        self.image = self.write("images/logo.png", "x" * 5000)
+
+    def compress(self, jobs=1, **kwargs):
+        with quiet():
+            return compress_public(self.public, jobs=jobs, manifest_path=self.manifest, **kwargs)
+
+    def test_writes_gzip_sidecars(self):
+        stats = self.compress()
+        self.assertEqual(stats.compressed, 2)
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 500)
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+        self.assertFalse(os.path.exists(self.small + ".gz"))
+        self.assertFalse(os.path.exists(self.image + ".gz"))
+
+    def test_unchanged_files_are_skipped(self):
+        self.compress()
+        stats = self.compress()
+        self.assertEqual((stats.compressed, stats.skipped), (0, 2))
+        self.write("index.html", "<p>changed</p>" * 500)
+        stats = self.compress()
+        self.assertEqual((stats.compressed, stats.skipped), (1, 1))
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>changed</p>" * 500)
+
+    def test_missing_sidecar_is_rewritten(self):
+        self.compress()
+        os.remove(self.css + ".gz")
+        self.assertEqual(self.compress().compressed, 1)
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+
+    def test_stale_sidecars_are_removed(self):
+        self.compress()
+        os.remove(self.page)
+        self.write("css/site.css", "small")
+        stats = self.compress()
+        self.assertEqual(stats.removed, 2)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+
+    def test_remove_compressed(self):
+        archive = self.write("files/archive.tar.gz", "not a sidecar")
+        self.compress()
+        with quiet():
+            self.assertEqual(remove_compressed(self.public, manifest_path=self.manifest), 2)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+        self.assertTrue(os.path.exists(archive))
+        self.assertFalse(os.path.exists(self.manifest))
+
+    def test_threshold_and_allowlist(self):
+        stats = self.compress(min_size=1, extensions=(".html",))
+        self.assertEqual(stats.compressed, 1)
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+        # too small to get any smaller
+        self.assertFalse(os.path.exists(self.small + ".gz"))
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+
+    def test_process_pool(self):
+        stats = self.compress(jobs=2)
+        self.assertEqual(stats.compressed, 2)
+        with gzip.open(self.css + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "body { color: red; }\n" * 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
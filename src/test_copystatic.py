@@ -0,0 +1,154 @@
+import os
+import unittest
+from unittest import mock
+from copystatic import copy_static_to_public, kernel_copy
+from fixtures import TempDirTestCase, quiet
+
+
+class TestCopyStatic(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = self.root = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, ".cache", "manifest.json")
+        self.write("index.css", "body {}")
+        self.write("images/logo.png", "png")
+
+    def sync(self, **kwargs):
+        with quiet():
+            return copy_static_to_public(self.src, self.dst, manifest_path=self.manifest, **kwargs)
+
+    def test_first_sync_copies_everything(self):
+        stats = self.sync()
+        self.assertEqual(stats.copied, 2)
+        self.assertEqual(stats.copied_bytes, 10)
+        with open(os.path.join(self.dst, "images", "logo.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    def test_second_sync_skips_unchanged(self):
+        self.sync()
+        dst_file = os.path.join(self.dst, "index.css")
+        mtime = os.stat(dst_file).st_mtime_ns
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.skipped, stats.skipped_bytes), (0, 2, 10))
+        self.assertEqual(os.stat(dst_file).st_mtime_ns, mtime)
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write("index.css", "body { color: red; }")
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.skipped), (1, 1))
+        with open(os.path.join(self.dst, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red; }")
+
+    def test_removed_file_is_deleted(self):
+        self.sync()
+        generated = os.path.join(self.dst, "index.html")
+        with open(generated, "w") as f:
+            f.write("<html></html>")
+        os.remove(os.path.join(self.src, "images", "logo.png"))
+        stats = self.sync()
+        self.assertEqual(stats.deleted, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        # files we didn't copy are left alone
+        self.assertTrue(os.path.exists(generated))
+
+    def test_missing_destination_file_is_recopied(self):
+        self.sync()
+        os.remove(os.path.join(self.dst, "index.css"))
+        stats = self.sync()
+        self.assertEqual(stats.copied, 1)
+
+    def test_hash_skips_touched_but_identical_file(self):
+        self.sync(use_hash=True)
+        path = os.path.join(self.src, "index.css")
+        os.utime(path, ns=(0, 0))
+        stats = self.sync(use_hash=True)
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+        self.assertEqual(self.sync().copied, 0)
+
+    def test_clean_copies_everything(self):
+        self.sync()
+        stats = self.sync(incremental=False)
+        self.assertEqual(stats.copied, 2)
+
+    def test_hardlink_mode(self):
+        self.sync(link_mode="hardlink")
+        src_stat = os.stat(os.path.join(self.src, "index.css"))
+        dst_stat = os.stat(os.path.join(self.dst, "index.css"))
+        self.assertEqual(src_stat.st_ino, dst_stat.st_ino)
+
+    def test_reflink_mode_falls_back_to_copy(self):
+        stats = self.sync(link_mode="reflink")
+        self.assertEqual(stats.copied, 2)
+        with open(os.path.join(self.dst, "index.css")) as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_copy_replaces_hardlink_without_touching_source(self):
+        self.sync(link_mode="hardlink")
+        self.write("index.css", "changed")
+        self.sync()
+        self.write("index.css", "changed again")
+        self.sync()
+        with open(os.path.join(self.dst, "index.css")) as f:
+            self.assertEqual(f.read(), "changed again")
+        src_stat = os.stat(os.path.join(self.src, "index.css"))
+        dst_stat = os.stat(os.path.join(self.dst, "index.css"))
+        self.assertNotEqual(src_stat.st_ino, dst_stat.st_ino)
+
+    def test_unknown_link_mode(self):
+        with self.assertRaises(ValueError):
+            self.sync(link_mode="symlink")
+
+    def test_summary_only_unless_verbose(self):
+        with quiet() as out:
+            copy_static_to_public(self.src, self.dst, manifest_path=self.manifest)
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+        os.remove(os.path.join(self.dst, "index.css"))
+        with quiet() as out:
+            copy_static_to_public(self.src, self.dst, manifest_path=self.manifest, verbose=True)
+        self.assertIn("Copied file:", out.getvalue())
+
+    def test_kernel_copy_large_file(self):
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        src_path = os.path.join(self.tmp.name, "big.bin")
+        dst_path = os.path.join(self.tmp.name, "big-copy.bin")
+        with open(src_path, "wb") as f:
+            f.write(data)
+        kernel_copy(src_path, dst_path)
+        with open(dst_path, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_fingerprint_names_and_manifest(self):
+        stats = self.sync(fingerprint=True)
+        output = stats.assets["index.css"]
+        self.assertRegex(output, r"^index\.[0-9a-f]{8}\.css$")
+        self.assertTrue(os.path.exists(os.path.join(self.dst, output)))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "index.css")))
+        with open(os.path.join(self.dst, "asset-manifest.json")) as f:
+            self.assertIn(f'"/index.css": "/{output}"', f.read())
+
+    def test_fingerprint_change_replaces_old_name(self):
+        old_output = self.sync(fingerprint=True).assets["index.css"]
+        self.write("index.css", "body { color: blue; }")
+        stats = self.sync(fingerprint=True)
+        new_output = stats.assets["index.css"]
+        self.assertNotEqual(old_output, new_output)
+        self.assertEqual((stats.copied, stats.deleted), (1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, old_output)))
+
+    def test_fingerprint_hash_cached_by_mtime(self):
+        self.sync(fingerprint=True)
+        with mock.patch("copystatic.file_hash", side_effect=AssertionError("rehashed")):
+            stats = self.sync(fingerprint=True)
+        self.assertEqual(stats.skipped, 2)
+
+    def test_turning_fingerprint_off_restores_names(self):
+        self.sync(fingerprint=True)
+        stats = self.sync()
+        self.assertEqual(stats.copied, 2)
+        self.assertEqual(sorted(os.listdir(self.dst)), ["images", "index.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
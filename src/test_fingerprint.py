@@ -0,0 +1,24 @@
+import unittest
+from fingerprint import asset_urls, fingerprint_path, rewrite_refs
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_fingerprint_path(self):
+        self.assertEqual(fingerprint_path("images/logo.png", "1234abcd5678"), "images/logo.1234abcd.png")
+        self.assertEqual(fingerprint_path("LICENSE", "1234abcd5678"), "LICENSE.1234abcd")
+
+    def test_asset_urls_skip_unrenamed(self):
+        urls = asset_urls({"index.css": "index.1234abcd.css", "robots.txt": "robots.txt"})
+        self.assertEqual(urls, {"/index.css": "/index.1234abcd.css"})
+
+    def test_rewrite_refs(self):
+        html = '<link href="/index.css"><img src="/missing.png"><a href="index.css">x</a>'
+        self.assertEqual(
+            rewrite_refs(html, {"/index.css": "/index.1234abcd.css"}),
+            '<link href="/index.1234abcd.css"><img src="/missing.png"><a href="index.css">x</a>',
+        )
+        self.assertEqual(rewrite_refs(html, None), html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import json
+import os
+import unittest
+from unittest import mock
+from buildcache import BuildCache
+from fixtures import TempDirTestCase, quiet
+from gencontent import extract_title, generate_pages
+from highlight import get_highlighter, set_highlighter
+from textnode import set_asset_urls, set_image_attributes
+
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class TestGenContent(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.root = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        self.write("index.md", "# Home\n\nWelcome **home**.")
+        self.write("blog/post.md", "# Post\n\n> quoted")
+        self.write("blog/notes.txt", "not markdown")
+
+    def generate(self, dest, jobs, cache=None):
+        with quiet():
+            return generate_pages(self.content, self.template, dest, jobs=jobs, cache=cache)
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("# Hello  \n\nbody"), "Hello")
+        self.assertEqual(extract_title("intro\n# Later"), "Later")
+
+    def test_extract_title_reads_lines_up_to_the_title(self):
+        lines = iter(["intro\n", "# Title\n", "never read\n"])
+        self.assertEqual(extract_title(lines), "Title")
+        self.assertEqual(list(lines), ["never read\n"])
+
+    def test_extract_title_missing(self):
+        with self.assertRaises(Exception):
+            extract_title("## Not a title")
+
+    def test_generate_pages(self):
+        dest = os.path.join(self.tmp.name, "public")
+        results = self.generate(dest, jobs=1)
+        self.assertEqual(
+            [path for path, _, _ in results],
+            [os.path.join(dest, "blog", "post.html"), os.path.join(dest, "index.html")],
+        )
+        self.assertEqual(
+            self.read(os.path.join(dest, "index.html")),
+            "<html><title>Home</title><body><div><h1>Home</h1><p>Welcome <b>home</b>.</p></div></body></html>",
+        )
+        self.assertIn("<blockquote>quoted</blockquote>", self.read(os.path.join(dest, "blog", "post.html")))
+        self.assertFalse(os.path.exists(os.path.join(dest, "blog", "notes.html")))
+
+    def test_title_is_escaped(self):
+        self.write("index.md", '# Q&A <"live">\n\nbody')
+        dest = os.path.join(self.tmp.name, "public")
+        self.generate(dest, jobs=1)
+        self.assertIn("<title>Q&amp;A &lt;&quot;live&quot;></title>", self.read(os.path.join(dest, "index.html")))
+
+    def test_process_pool_matches_serial(self):
+        for i in range(20):
+            self.write(f"pages/page{i}.md", f"# Page {i}\n\n- item {i}")
+        serial_dest = os.path.join(self.tmp.name, "serial")
+        pool_dest = os.path.join(self.tmp.name, "pool")
+        serial = self.generate(serial_dest, jobs=1)
+        pool = self.generate(pool_dest, jobs=3)
+        self.assertEqual(
+            [os.path.relpath(path, serial_dest) for path, _, _ in serial],
+            [os.path.relpath(path, pool_dest) for path, _, _ in pool],
+        )
+        for path, _, _ in serial:
+            rel_path = os.path.relpath(path, serial_dest)
+            self.assertEqual(self.read(path), self.read(os.path.join(pool_dest, rel_path)))
+
+    def test_process_pool_saves_block_and_highlight_caches(self):
+        self.write("code.md", "# Code\n\n```python\nx = 1\n```")
+        block_path = os.path.join(self.tmp.name, "blocks.json")
+        highlight_path = os.path.join(self.tmp.name, "highlight.json")
+        self.addCleanup(set_highlighter, get_highlighter())
+        with quiet():
+            generate_pages(
+                self.content,
+                self.template,
+                os.path.join(self.tmp.name, "public"),
+                jobs=2,
+                block_cache_path=block_path,
+                highlight_cache_path=highlight_path,
+            )
+        with open(block_path) as f:
+            blocks = dict(json.load(f)["blocks"])
+        self.assertIn("```python\nx = 1\n```", blocks)
+        self.assertIn("<h1>Post</h1>", blocks.values())
+        with open(highlight_path) as f:
+            self.assertEqual(len(json.load(f)["entries"]), 1)
+
+    def test_large_pages_stream_to_their_output(self):
+        self.write("big.md", "# Big\n\n" + "\n\n".join(f"Paragraph **{i}**" for i in range(2000)))
+        dest = os.path.join(self.tmp.name, "public")
+        self.generate(dest, jobs=1)
+        buffered = self.read(os.path.join(dest, "big.html"))
+        self.assertTrue(buffered.endswith("<p>Paragraph <b>1999</b></p></div></body></html>"))
+
+        cache = BuildCache(os.path.join(self.tmp.name, "cache"), version="test")
+        streamed = os.path.join(self.tmp.name, "streamed")
+        with mock.patch("gencontent.STREAM_MIN_BYTES", 1024):
+            self.generate(streamed, jobs=1, cache=cache)
+            results = self.generate(streamed, jobs=1, cache=cache)
+        self.assertEqual(self.read(os.path.join(streamed, "big.html")), buffered)
+        self.assertEqual([hit for _, _, hit in results], [True, True, True])
+
+    def test_cache_hits_skip_rendering(self):
+        cache = BuildCache(os.path.join(self.tmp.name, "cache"), version="test")
+        dest = os.path.join(self.tmp.name, "public")
+        first = self.generate(dest, jobs=1, cache=cache)
+        self.assertEqual([hit for _, _, hit in first], [False, False])
+        expected = self.read(os.path.join(dest, "index.html"))
+        os.remove(os.path.join(dest, "index.html"))
+
+        self.write("index.md", "# Home\n\nWelcome **home**.")
+        with mock.patch("gencontent.write_markdown_html", side_effect=AssertionError("rendered")):
+            second = self.generate(dest, jobs=1, cache=cache)
+        self.assertEqual([hit for _, _, hit in second], [True, True])
+        self.assertEqual(self.read(os.path.join(dest, "index.html")), expected)
+
+    def test_cache_invalidated_by_template_change(self):
+        cache = BuildCache(os.path.join(self.tmp.name, "cache"), version="test")
+        dest = os.path.join(self.tmp.name, "public")
+        self.generate(dest, jobs=1, cache=cache)
+        with open(self.template, "w") as f:
+            f.write("<main>{{ Content }}</main>")
+        results = self.generate(dest, jobs=1, cache=cache)
+        self.assertEqual([hit for _, _, hit in results], [False, False])
+        self.assertTrue(self.read(os.path.join(dest, "index.html")).startswith("<main>"))
+
+    def test_asset_urls_rewrite_template_and_content(self):
+        self.write("index.md", "# Home\n\n![logo](/images/logo.png)")
+        with open(self.template, "w") as f:
+            f.write('<link href="/index.css">{{ Content }}')
+        dest = os.path.join(self.tmp.name, "public")
+        urls = {"/index.css": "/index.1234abcd.css", "/images/logo.png": "/images/logo.5678abcd.png"}
+        with quiet():
+            generate_pages(self.content, self.template, dest, jobs=1, asset_urls=urls)
+        set_asset_urls(None)
+        html = self.read(os.path.join(dest, "index.html"))
+        self.assertIn('href="/index.1234abcd.css"', html)
+        self.assertIn('src="/images/logo.5678abcd.png"', html)
+
+    def test_asset_changes_only_invalidate_pages_using_them(self):
+        self.write("index.md", "# Home\n\n![logo](/images/logo.png)")
+        cache = BuildCache(os.path.join(self.tmp.name, "cache"), version="test")
+        dest = os.path.join(self.tmp.name, "public")
+
+        def generate(sizes):
+            with quiet():
+                results = generate_pages(self.content, self.template, dest, jobs=1, cache=cache, image_sizes=sizes)
+            set_image_attributes(None)
+            return [(os.path.basename(path), hit) for path, _, hit in results]
+
+        generate({"/images/logo.png": (64, 32), "/images/photo.jpg": (800, 600)})
+        # post.md shows no images, so only index.md re-renders
+        results = generate({"/images/logo.png": (128, 64), "/images/photo.jpg": (800, 600)})
+        self.assertEqual(results, [("post.html", True), ("index.html", False)])
+        self.assertIn('width="128" height="64"', self.read(os.path.join(dest, "index.html")))
+        results = generate({"/images/logo.png": (128, 64), "/images/photo.jpg": (400, 300)})
+        self.assertEqual(results, [("post.html", True), ("index.html", True)])
+
+    def test_pages_replace_hardlinked_outputs(self):
+        # a staged build is seeded with hardlinks to the published files
+        for jobs in (1, 2):
+            published = os.path.join(self.tmp.name, f"published{jobs}.html")
+            with open(published, "w") as f:
+                f.write("published")
+            dest = os.path.join(self.tmp.name, f"staged{jobs}")
+            os.makedirs(dest)
+            os.link(published, os.path.join(dest, "index.html"))
+            self.generate(dest, jobs=jobs)
+            self.assertEqual(self.read(published), "published")
+            self.assertIn("<h1>Home</h1>", self.read(os.path.join(dest, "index.html")))
+
+    def test_template_without_content(self):
+        with open(self.template, "w") as f:
+            f.write("<html></html>")
+        with self.assertRaises(ValueError):
+            self.generate(os.path.join(self.tmp.name, "public"), jobs=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
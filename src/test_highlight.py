@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from block_markdown import markdown_to_html_node
+from highlight import Highlighter, builtin_highlight, get_highlighter, pygments, set_highlighter
+
+
+class TestBuiltinHighlight(unittest.TestCase):
+    def test_python(self):
+        html = builtin_highlight('def f(x):\n    return "a<b" # done', "python")
+        self.assertEqual(
+            html,
+            '<span style="color:#008000;font-weight:bold">def</span> f(x):\n'
+            '    <span style="color:#008000;font-weight:bold">return</span> '
+            '<span style="color:#ba2121">"a&lt;b"</span> '
+            '<span style="color:#408080;font-style:italic"># done</span>',
+        )
+
+    def test_keywords_inside_strings_and_comments(self):
+        html = builtin_highlight("x = 'if' // while", "js")
+        self.assertIn("<span style=\"color:#ba2121\">'if'</span>", html)
+        self.assertIn('<span style="color:#408080;font-style:italic">// while</span>', html)
+        self.assertNotIn(">if</span>", html)
+
+    def test_theme(self):
+        html = builtin_highlight("true", "json", theme="monokai")
+        self.assertEqual(html, '<span style="color:#66d9ef">true</span>')
+
+    def test_unknown_language(self):
+        self.assertIsNone(builtin_highlight("x", "cobol"))
+
+    def test_plain_text_is_escaped(self):
+        self.assertEqual(builtin_highlight("a && b > c", "bash"), "a &amp;&amp; b &gt; c")
+
+
+class TestHighlighter(unittest.TestCase):
+    def test_cache_hits(self):
+        highlighter = Highlighter(use_pygments=False)
+        first = highlighter.highlight("x = 1", "python")
+        self.assertEqual(highlighter.highlight("x = 1", "python"), first)
+        self.assertEqual((highlighter.hits, highlighter.misses), (1, 1))
+        highlighter.highlight("x = 1", "javascript")
+        self.assertEqual(highlighter.misses, 2)
+
+    def test_key_covers_theme_and_backend(self):
+        default = Highlighter(use_pygments=False)
+        monokai = Highlighter("monokai", use_pygments=False)
+        self.assertNotEqual(default.key("x", "python"), monokai.key("x", "python"))
+        self.assertNotEqual(default.key("ab", "c"), default.key("a", "bc"))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "highlight.json")
+            highlighter = Highlighter(use_pygments=False, path=path)
+            html = highlighter.highlight("x = 1", "python")
+            highlighter.save()
+            loaded = Highlighter(use_pygments=False, path=path)
+            self.assertEqual(loaded.highlight("x = 1", "python"), html)
+            self.assertEqual((loaded.hits, loaded.misses), (1, 0))
+            # a change to the lexer rules changes the version
+            other = Highlighter(use_pygments=False, path=path, version="other")
+            other.highlight("x = 1", "python")
+            self.assertEqual((other.hits, other.misses), (0, 1))
+
+    @unittest.skipIf(pygments is None, "Pygments isn't installed")
+    def test_pygments(self):
+        highlighter = Highlighter()
+        self.assertTrue(highlighter.backend.startswith("pygments-"))
+        html = highlighter.highlight("def f(): pass", "python")
+        self.assertIn("<span style=", html)
+        self.assertIn("def</span>", html)
+        # unknown to Pygments and to the built-in lexers
+        self.assertIsNone(highlighter.highlight("x", "no-such-language"))
+
+
+class TestHandleCode(unittest.TestCase):
+    def setUp(self):
+        previous = get_highlighter()
+        self.addCleanup(set_highlighter, previous)
+        set_highlighter(Highlighter(use_pygments=False))
+
+    def render(self, markdown):
+        return markdown_to_html_node(markdown).to_html()
+
+    def test_language_tag(self):
+        self.assertEqual(
+            self.render("```json\n{\"a\": 1}\n```"),
+            '<div><pre><code class="language-json">{<span style="color:#008000;font-weight:bold">"a"</span>: '
+            '<span style="color:#666666">1</span>}</code></pre></div>',
+        )
+
+    def test_unknown_language_is_plain(self):
+        self.assertEqual(self.render("```cobol\nDISPLAY 'HI'.\n```"), "<div><pre><code class=\"language-cobol\">DISPLAY 'HI'.</code></pre></div>")
+
+    def test_untagged_block(self):
+        self.assertEqual(self.render("```\nx = 1\n```"), "<div><pre><code>x = 1</code></pre></div>")
+
+    def test_highlighting_off(self):
+        set_highlighter(None)
+        self.assertEqual(self.render("```python\nx = 1\n```"), '<div><pre><code class="language-python">x = 1</code></pre></div>')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import FrozenNode, HTMLNode, LeafNode, ParentNode, RawNode, escape, escape_attribute, escape_text
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -104,6 +105,118 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(parent.to_html(), '<div class="container"><span>child</span></div>')
 
 
+    def test_iter_html_matches_to_html(self):
+        parent = ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]), LeafNode("hr", "")],
+            {"class": "container"},
+        )
+        self.assertEqual("".join(parent.iter_html()), parent.to_html())
+        self.assertEqual(
+            parent.to_html(),
+            '<div class="container"><p><b>Bold</b> text</p><hr></hr></div>',
+        )
+
+    def test_write_html_to_sink(self):
+        children = [LeafNode("li", str(i)) for i in range(20000)]
+        parent = ParentNode("ul", children)
+        sink = io.StringIO()
+        parent.write_html(sink)
+        self.assertEqual(sink.getvalue(), parent.to_html())
+
+    def test_to_html_deep_nesting(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(html.count("</span>"), 5000)
+
+    def test_to_html_raises_nested_no_children(self):
+        parent = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            parent.to_html()
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text('a < b && "c" > d'), 'a &lt; b &amp;&amp; "c" > d')
+        text = "nothing to escape"
+        self.assertIs(escape_text(text), text)
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute('/q?a=1&b="2"<'), "/q?a=1&amp;b=&quot;2&quot;<")
+        self.assertEqual(escape('"a" & <b>'), "&quot;a&quot; &amp; &lt;b>")
+
+    def test_leaf_escapes_value_and_props(self):
+        node = LeafNode("a", "<script>&", {"href": '/x?a=1&b=2" onclick="evil'})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/x?a=1&amp;b=2&quot; onclick=&quot;evil">&lt;script>&amp;</a>',
+        )
+        self.assertEqual(LeafNode(None, "1 < 2").to_html(), "1 &lt; 2")
+
+    def test_non_string_values_and_props(self):
+        self.assertEqual(LeafNode("img", "", {"width": 640, "height": 480}).to_html(), '<img width="640" height="480"></img>')
+        self.assertEqual(LeafNode("li", 5).to_html(), "<li>5</li>")
+        self.assertEqual(LeafNode(None, 0).to_html(), "0")
+        self.assertEqual(ParentNode("div", [LeafNode("b", 1.5)], {"tabindex": 0}).to_html(), '<div tabindex="0"><b>1.5</b></div>')
+        self.assertEqual((escape_text(3), escape_attribute(4)), ("3", "4"))
+
+    def test_raw_node_is_not_escaped(self):
+        parent = ParentNode("code", [RawNode('<span style="x">&lt;</span>'), LeafNode(None, "<")])
+        self.assertEqual(parent.to_html(), '<code><span style="x">&lt;</span>&lt;</code>')
+        with self.assertRaises(ValueError):
+            RawNode(None).to_html()
+
+    def nav(self):
+        return ParentNode("nav", [LeafNode("a", "Home", {"href": "/"}), RawNode("&middot;"), LeafNode("a", "A & B", {"href": "/ab"})])
+
+    def test_frozen_node_renders_once(self):
+        nav = self.nav().freeze()
+        html = nav.to_html()
+        self.assertEqual(html, '<nav><a href="/">Home</a>&middot;<a href="/ab">A &amp; B</a></nav>')
+        self.assertEqual(nav.hits, 0)
+        pages = [ParentNode("body", [nav, LeafNode("p", f"page {i}")]) for i in range(3)]
+        sink = io.StringIO()
+        pages[0].write_html(sink)
+        self.assertEqual(sink.getvalue(), f"<body>{html}<p>page 0</p></body>")
+        self.assertEqual([page.to_html() for page in pages[1:]], [f"<body>{html}<p>page {i}</p></body>" for i in (1, 2)])
+        self.assertEqual(nav.hits, 3)
+        self.assertIs(nav.freeze(), nav)
+
+    def test_frozen_node_rejects_changes(self):
+        original = self.nav()
+        nav = original.freeze()
+        changes = [
+            lambda: setattr(nav, "tag", "div"),
+            lambda: setattr(nav.children[0], "value", "Away"),
+            lambda: delattr(nav.children[2], "props"),
+            lambda: nav.children.append(LeafNode(None, "x")),
+            lambda: nav.children[0].props.update(href="/away"),
+        ]
+        for change in changes:
+            with self.assertRaises((AttributeError, TypeError)):
+                change()
+        # it's a copy, so the original can still change without affecting it
+        original.children.append(LeafNode(None, "more"))
+        self.assertEqual(nav.to_html(), '<nav><a href="/">Home</a>&middot;<a href="/ab">A &amp; B</a></nav>')
+
+    def test_frozen_node_shares_nested_fragments(self):
+        footer = ParentNode("footer", [LeafNode(None, "bye")]).freeze()
+        page = ParentNode("main", [LeafNode("p", "hi"), footer]).freeze()
+        self.assertIs(page.children[1], footer)
+        footer.to_html()
+        self.assertEqual(page.to_html(), "<main><p>hi</p><footer>bye</footer></main>")
+        self.assertEqual(footer.hits, 1)
+        self.assertIsInstance(page.children[0], LeafNode)
+        self.assertFalse(hasattr(page.children[0], "__dict__"))
+
+    def test_freeze_deep_nesting(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        frozen = FrozenNode(node)
+        self.assertEqual(frozen.to_html(), node.to_html())
+
 
 if __name__ == "__main__":
     unittest.main()
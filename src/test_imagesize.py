@@ -0,0 +1,78 @@
+import os
+import struct
+import unittest
+from fixtures import TempDirTestCase
+from imagesize import ImageSizeCache, image_sizes, probe
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00"
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    # large APP1 segments before the frame header, like EXIF data
+    app1 = b"\xff\xe1" + struct.pack(">H", 60002) + b"\x00" * 60000
+    sof = b"\xff\xc2" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + app1 + app1 + sof + b"\xff\xda"
+
+
+def webp(chunk, payload):
+    return b"RIFF" + struct.pack("<I", 4 + 8 + len(payload)) + b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+
+
+class TestImageSize(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_png(self):
+        self.assertEqual(probe(self.write("a.png", png(1026, 388))), (1026, 388))
+
+    def test_gif(self):
+        self.assertEqual(probe(self.write("a.gif", b"GIF89a" + struct.pack("<HH", 320, 200) + b"\x00" * 10)), (320, 200))
+
+    def test_jpeg(self):
+        self.assertEqual(probe(self.write("a.jpg", jpeg(1920, 1080))), (1920, 1080))
+
+    def test_webp(self):
+        lossy = b"\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 400, 300) + b"\x00" * 4
+        self.assertEqual(probe(self.write("lossy.webp", webp(b"VP8 ", lossy))), (400, 300))
+        bits = (400 - 1) | ((300 - 1) << 14)
+        lossless = b"\x2f" + bits.to_bytes(4, "little") + b"\x00" * 4
+        self.assertEqual(probe(self.write("lossless.webp", webp(b"VP8L", lossless))), (400, 300))
+        extended = b"\x00" * 4 + (400 - 1).to_bytes(3, "little") + (300 - 1).to_bytes(3, "little")
+        self.assertEqual(probe(self.write("extended.webp", webp(b"VP8X", extended))), (400, 300))
+
+    def test_unknown_format(self):
+        self.assertIsNone(probe(self.write("a.png", b"not an image")))
+
+    def test_truncated_or_corrupt_headers(self):
+        cases = {
+            "a.png": png(10, 20)[:20],
+            "a.gif": b"GIF89a\x01",
+            "a.webp": webp(b"VP8L", b"")[:20],
+            "lossy.webp": webp(b"VP8 ", b"\x00\x00\x00\x9d\x01\x2a\x01"),
+            "a.jpg": b"\xff\xd8\xff\xe0\x00\x00",
+        }
+        for name, data in cases.items():
+            self.assertIsNone(probe(self.write(name, data)), name)
+
+    def test_cache_reuses_probes_until_file_changes(self):
+        path = self.write("static/images/a.png", png(10, 20))
+        cache_path = os.path.join(self.tmp.name, "sizes.json")
+        cache = ImageSizeCache(cache_path)
+        static = os.path.join(self.tmp.name, "static")
+        self.assertEqual(image_sizes(static, cache), {"/images/a.png": (10, 20)})
+
+        cache = ImageSizeCache(cache_path)
+        self.assertEqual(image_sizes(static, cache), {"/images/a.png": (10, 20)})
+        self.assertEqual(cache.probes, 0)
+
+        self.write("static/images/a.png", png(30, 40))
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(image_sizes(static, cache), {"/images/a.png": (30, 40)})
+        self.assertEqual(cache.probes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
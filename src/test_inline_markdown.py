@@ -1,5 +1,6 @@
+import random
 import unittest
-from inline_markdown import extract_markdown_images, extract_markdown_links, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_text_nodes
+from inline_markdown import extract_markdown_images, extract_markdown_links, extract_markdown_urls, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_text_nodes
 from textnode import TextNode, TextType
 
 class TestInlineMarkdown(unittest.TestCase):
@@ -88,6 +89,11 @@ class TestInlineMarkdown(unittest.TestCase):
     def test_extract_markdown_links_none(self):
         matches = extract_markdown_links("No links here!")
         self.assertListEqual([], matches)
+
+    def test_extract_markdown_urls(self):
+        urls = extract_markdown_urls("See [docs](/docs), ![logo](/logo.png) and [more](/more)")
+        self.assertListEqual([("image", "/logo.png"), ("link", "/docs"), ("link", "/more")], urls)
+        self.assertListEqual([], extract_markdown_urls("No links here!"))
     
     def test_split_images(self):
         node = TextNode(
@@ -166,6 +172,66 @@ class TestInlineMarkdown(unittest.TestCase):
             ],
         )
 
+    def test_nested_and_adjacent_delimiters(self):
+        nodes = text_to_text_nodes("**a _b_ `c`**_d_`e`")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("", TextType.TEXT),
+                TextNode("a _b_ `c`", TextType.BOLD),
+                TextNode("", TextType.TEXT),
+                TextNode("d", TextType.ITALIC),
+                TextNode("", TextType.TEXT),
+                TextNode("e", TextType.CODE),
+                TextNode("", TextType.TEXT),
+            ],
+        )
+
+    def test_link_url_with_balanced_parens(self):
+        self.assertListEqual(
+            split_nodes_link([TextNode("[Foo](https://en.wikipedia.org/wiki/Foo(bar)) end", TextType.TEXT)]),
+            [
+                TextNode("", TextType.TEXT),
+                TextNode("Foo", TextType.LINK, "https://en.wikipedia.org/wiki/Foo(bar)"),
+                TextNode(" end", TextType.TEXT),
+            ],
+        )
+
+    def test_link_text_stops_at_open_bracket(self):
+        self.assertListEqual(
+            text_to_text_nodes("[a [b](u)"),
+            [TextNode("[a ", TextType.TEXT), TextNode("b", TextType.LINK, "u")],
+        )
+
+    def test_higher_delimiter_inside_lower_raises(self):
+        with self.assertRaises(Exception):
+            text_to_text_nodes("_a **b** c_")
+        with self.assertRaises(Exception):
+            text_to_text_nodes("`a_b_c`")
+
+    def test_matches_chained_passes(self):
+        rng = random.Random(1234)
+        pieces = ["a", " ", "**", "*", "_", "`", "[", "]", "(", ")", "!", "x.png", "![i](u)", "[l](v)"]
+        for _ in range(3000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 14)))
+            try:
+                expected = chained_text_to_text_nodes(text)
+            except Exception:
+                with self.assertRaises(Exception):
+                    text_to_text_nodes(text)
+                continue
+            self.assertListEqual(text_to_text_nodes(text), expected, text)
+
+
+def chained_text_to_text_nodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,94 @@
+import os
+import unittest
+from fixtures import TempDirTestCase, quiet
+from linkcheck import LinkIndex, check_links, extract_links, resolve, target_exists
+
+
+class TestExtractLinks(unittest.TestCase):
+    def test_links_and_images_with_lines(self):
+        markdown = "# Title\n\nSee [docs](/docs/) and ![logo](/images/logo.png).\n\n- [a](a.html) [b](b.html)"
+        self.assertEqual(
+            extract_links(markdown),
+            [
+                (3, "image", "/images/logo.png"),
+                (3, "link", "/docs/"),
+                (5, "link", "a.html"),
+                (5, "link", "b.html"),
+            ],
+        )
+
+    def test_code_is_skipped(self):
+        markdown = "```\n[not](a link)\n```\n\nsome `[code](x)` and [real](y.html)\n\n```[x](y)```"
+        self.assertEqual(extract_links(markdown), [(5, "link", "y.html")])
+
+    def test_fence_closes_at_end_of_content_line(self):
+        markdown = "```\nfunc main(){\n}```\n\nWant to [get](/c) in touch?"
+        self.assertEqual(extract_links(markdown), [(5, "link", "/c")])
+
+
+class TestResolve(unittest.TestCase):
+    def test_internal(self):
+        self.assertEqual(resolve("/a/b.html#top", "/index.html"), "/a/b.html")
+        self.assertEqual(resolve("../c.html?x=1", "/blog/post.html"), "/c.html")
+        self.assertEqual(resolve("sub/", "/blog/post.html"), "/blog/sub/")
+        self.assertEqual(resolve("/my%20file.png", "/index.html"), "/my file.png")
+
+    def test_external(self):
+        for url in ("https://example.com/", "//cdn.example.com/x.js", "mailto:a@b.c", "#section"):
+            self.assertIsNone(resolve(url, "/index.html"))
+
+    def test_target_exists(self):
+        targets = {"/index.html", "/blog/index.html", "/about.html", "/style.css"}
+        for path in ("/", "/blog/", "/blog", "/about", "/about.html", "/style.css"):
+            self.assertTrue(target_exists(path, targets), path)
+        for path in ("/missing.html", "/about/", "/style"):
+            self.assertFalse(target_exists(path, targets), path)
+
+
+class TestCheckLinks(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.index = LinkIndex(os.path.join(self.tmp.name, "links.json"))
+        self.write("static/images/logo.png", "png")
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post.html) ![Logo](/images/logo.png)\n\n[Gone](/gone.html)")
+        self.write("content/blog/post.md", "# Post\n\n[Home](../index.html) [Missing](missing.png) [Site](https://example.com)")
+
+    def check(self, index=None):
+        with quiet() as out:
+            broken = check_links(self.content, self.static, index or self.index)
+        return broken, out.getvalue()
+
+    def test_reports_broken_with_file_and_line(self):
+        broken, out = self.check()
+        self.assertEqual(
+            broken,
+            [
+                (os.path.join(self.content, "blog", "post.md"), 3, "link", "missing.png"),
+                (os.path.join(self.content, "index.md"), 5, "link", "/gone.html"),
+            ],
+        )
+        self.assertIn("index.md:5: broken link /gone.html", out)
+        self.assertIn("Found 2 broken links", out)
+
+    def test_only_changed_pages_are_rescanned(self):
+        self.check()
+        self.assertEqual(self.index.scans, 2)
+        index = LinkIndex(self.index.path)
+        self.write("content/gone.md", "# Gone\n\n[Home](/)")
+        broken, _ = self.check(index)
+        # the new page is scanned, and it fixes the link to it
+        self.assertEqual(index.scans, 1)
+        self.assertEqual([url for _, _, _, url in broken], ["missing.png"])
+
+    def test_deleted_pages_are_pruned(self):
+        self.check()
+        os.remove(os.path.join(self.content, "index.md"))
+        broken, _ = self.check()
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual([url for _, _, _, url in broken], ["../index.html", "missing.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import unittest
+import block_markdown
+import gencontent
+import htmlnode
+from buildcache import BuildCache
+from fixtures import TempDirTestCase, quiet
+from gencontent import generate_pages
+from profiler import Profiler
+
+
+class TestProfiler(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.root = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.write("index.md", "# Home\n\nWelcome **home**.")
+        self.write("blog/post.md", "# Post\n\n- one\n- two _three_")
+        self.profiler = Profiler()
+        self.addCleanup(self.profiler.disable)
+
+    def build(self, **kwargs):
+        with quiet():
+            generate_pages(self.content, self.template, os.path.join(self.tmp.name, "public"), jobs=1, **kwargs)
+
+    def test_disabled_profiler_wraps_nothing(self):
+        original = gencontent.write_markdown_html
+        with self.profiler.stage("build"):
+            self.build()
+        self.assertIs(gencontent.write_markdown_html, original)
+        self.assertEqual(self.profiler.report()["stages"], {})
+
+    def test_disable_restores_originals(self):
+        originals = (
+            gencontent.generate_page,
+            block_markdown.text_to_text_nodes,
+            htmlnode.HTMLNode.write_html,
+            htmlnode.HTMLNode.__init__,
+        )
+        self.profiler.enable()
+        self.assertIsNot(gencontent.generate_page, originals[0])
+        self.profiler.disable()
+        restored = (
+            gencontent.generate_page,
+            block_markdown.text_to_text_nodes,
+            htmlnode.HTMLNode.write_html,
+            htmlnode.HTMLNode.__init__,
+        )
+        for original, current in zip(originals, restored):
+            self.assertIs(current, original)
+
+    def test_report_counts_stages_nodes_and_pages(self):
+        self.profiler.enable()
+        with self.profiler.stage("generate_pages"):
+            self.build()
+        report = self.profiler.report()
+        stages = report["stages"]
+        self.assertEqual(stages["generate_pages"]["calls"], 1)
+        self.assertEqual(stages["generate_page"]["calls"], 2)
+        self.assertEqual(stages["render_markdown"]["calls"], 2)
+        self.assertEqual(stages["block_to_html_node"]["calls"], 4)
+        self.assertEqual(stages["text_to_text_nodes"]["calls"], 5)
+        self.assertEqual(stages["iter_blocks"]["calls"], 2)
+        self.assertEqual(stages["write_template"]["calls"], 2)
+        self.assertEqual(stages["queue_write"]["calls"], 2)
+        self.assertEqual(stages["write_file"]["calls"], 2)
+        self.assertEqual(stages["wait_for_writes"]["calls"], 1)
+        self.assertGreater(report["nodes"]["ParentNode"], 0)
+        self.assertGreater(report["nodes"]["LeafNode"], 0)
+        self.assertGreater(report["nodes"]["TextNode"], 0)
+        self.assertEqual(report["pages"], 2)
+        paths = {page["path"] for page in report["slowest_pages"]}
+        self.assertEqual(paths, {os.path.join(self.content, "index.md"), os.path.join(self.content, "blog", "post.md")})
+
+    def test_block_cache_and_copies_from_the_build_cache(self):
+        self.profiler.enable()
+        cache = BuildCache(os.path.join(self.tmp.name, "cache"), version="test")
+        block_cache_path = os.path.join(self.tmp.name, "blocks.json")
+        self.build(cache=cache, block_cache_path=block_cache_path)
+        self.build(cache=cache, block_cache_path=block_cache_path)
+        stages = self.profiler.report()["stages"]
+        self.assertEqual(stages["block_cache"]["calls"], 4)
+        self.assertEqual(stages["copy_file"]["calls"], 2)
+
+    def test_slowest_pages_are_sorted_and_capped(self):
+        for i in range(5):
+            self.write(f"page{i}.md", "# Page\n\n" + "word " * (i * 2000))
+        self.profiler.enable()
+        self.build()
+        slowest = self.profiler.report(top=3)["slowest_pages"]
+        self.assertEqual(len(slowest), 3)
+        seconds = [page["seconds"] for page in slowest]
+        self.assertEqual(seconds, sorted(seconds, reverse=True))
+
+    def test_write_report(self):
+        self.profiler.enable()
+        self.build()
+        path = os.path.join(self.tmp.name, "profile.json")
+        self.profiler.write_report(path)
+        with open(path) as f:
+            self.assertEqual(json.load(f)["pages"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
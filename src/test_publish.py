@@ -0,0 +1,119 @@
+import os
+import threading
+import unittest
+from fixtures import TempDirTestCase
+from publish import FileWriter, Generations, write_file
+
+
+class TestGenerations(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = self.root = os.path.join(self.tmp.name, "public")
+        self.generations = Generations(self.dest, keep=2)
+
+    def write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_file(path, content)
+
+    def build(self, content):
+        staged = self.generations.stage()
+        self.write(os.path.join(staged, "index.html"), content)
+        self.generations.publish(staged)
+        return staged
+
+    def test_publish_swaps_symlink(self):
+        first = self.build("one")
+        self.assertTrue(os.path.islink(self.dest))
+        self.assertEqual(self.generations.current(), first)
+        self.assertEqual(self.read("index.html"), "one")
+        second = self.build("two")
+        self.assertEqual(self.generations.current(), second)
+        self.assertEqual(self.read("index.html"), "two")
+
+    def test_unpublished_stage_is_invisible(self):
+        self.build("one")
+        staged = self.generations.stage()
+        self.write(os.path.join(staged, "index.html"), "half")
+        self.assertEqual(self.read("index.html"), "one")
+        self.generations.discard(staged)
+        self.assertFalse(os.path.exists(staged))
+
+    def test_stage_is_seeded_with_hardlinks(self):
+        first = self.build("one")
+        staged = self.generations.stage()
+        published = os.path.join(first, "index.html")
+        seeded = os.path.join(staged, "index.html")
+        self.assertTrue(os.path.samefile(published, seeded))
+        self.assertEqual(os.listdir(self.generations.stage(seed=False)), [])
+
+    def test_old_generations_are_pruned(self):
+        self.build("one")
+        second = self.build("two")
+        third = self.build("three")
+        self.assertEqual(self.generations.generations(), [second, third])
+
+    def test_rollback(self):
+        first = self.build("one")
+        second = self.build("two")
+        self.assertEqual(self.generations.rollback(), first)
+        self.assertEqual(self.read("index.html"), "one")
+        self.assertFalse(os.path.exists(second))
+        with self.assertRaises(ValueError):
+            self.generations.rollback()
+
+    def test_existing_directory_is_adopted(self):
+        self.write(os.path.join(self.dest, "old.html"), "old")
+        self.build("new")
+        self.assertEqual(self.read("old.html"), "old")
+        self.assertEqual(self.generations.rollback(), self.generations.generations()[0])
+        self.assertEqual(os.listdir(self.dest), ["old.html"])
+
+
+class TestFileWriter(TempDirTestCase):
+    def test_writes_and_copies(self):
+        src = os.path.join(self.tmp.name, "src.txt")
+        with open(src, "w") as f:
+            f.write("copied")
+        with FileWriter(threads=2, max_pending=2) as writer:
+            for i in range(10):
+                writer.write(os.path.join(self.tmp.name, f"{i}.html"), f"page {i}".encode())
+            writer.copy(src, os.path.join(self.tmp.name, "copy.txt"))
+        for i in range(10):
+            with open(os.path.join(self.tmp.name, f"{i}.html")) as f:
+                self.assertEqual(f.read(), f"page {i}")
+        with open(os.path.join(self.tmp.name, "copy.txt")) as f:
+            self.assertEqual(f.read(), "copied")
+        self.assertEqual(sorted(os.listdir(self.tmp.name))[-1], "src.txt")
+
+    def test_replaces_hardlinked_file(self):
+        path = os.path.join(self.tmp.name, "page.html")
+        linked = os.path.join(self.tmp.name, "published.html")
+        with open(linked, "w") as f:
+            f.write("published")
+        os.link(linked, path)
+        with FileWriter() as writer:
+            writer.write(path, "staged")
+        with open(linked) as f:
+            self.assertEqual(f.read(), "published")
+
+    def test_pending_writes_are_bounded(self):
+        gate = threading.Event()
+        writer = FileWriter(threads=1, max_pending=1)
+        writer._submit(gate.wait)
+        blocked = threading.Thread(target=writer.write, args=(os.path.join(self.tmp.name, "a"), "a"))
+        blocked.start()
+        blocked.join(0.05)
+        self.assertTrue(blocked.is_alive())
+        gate.set()
+        blocked.join()
+        writer.close()
+
+    def test_close_raises_write_errors(self):
+        writer = FileWriter()
+        writer.write(os.path.join(self.tmp.name, "missing", "page.html"), "x")
+        with self.assertRaises(FileNotFoundError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
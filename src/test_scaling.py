@@ -0,0 +1,201 @@
+import gc
+import math
+import time
+import unittest
+from block_markdown import markdown_to_blocks, markdown_to_html_node
+from highlight import builtin_highlight, lexer
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import (
+    extract_markdown_images,
+    extract_markdown_links,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_text_nodes,
+)
+from linkcheck import extract_links
+from search import page_text, tokenize
+from template import Template
+from textnode import TextNode, TextType
+
+# Each entry point is timed on adversarial input at doubling sizes, and the
+# slope of log(time) against log(size) must stay near linear. n log n over
+# the 8x range measured here fits to about 1.15 and quadratic to 2.
+MAX_EXPONENT = 1.4
+DOUBLINGS = 3
+# the smallest size is doubled until one call takes this long, so timer
+# noise doesn't dominate the fit
+MIN_SECONDS = 0.001
+START_SIZE = 64
+MAX_SIZE = 1 << 20
+
+
+def run(func, data, invalid=False):
+    # Invalid input has to be rejected, and is only worth timing when the
+    # error is found at its end: one raised at the first character takes
+    # the same time at any size.
+    if not invalid:
+        func(data)
+        return
+    try:
+        func(data)
+    except Exception:
+        return
+    raise AssertionError("invalid input was accepted")
+
+
+def timed(func, data, repeat, invalid=False):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(func, data, invalid)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_exponent(func, make_input, repeat=5, min_seconds=MIN_SECONDS, invalid=False):
+    # warm up (lazily compiled regexes and the like) before timing anything
+    run(func, make_input(START_SIZE), invalid)
+    size = START_SIZE
+    while size < MAX_SIZE and timed(func, make_input(size), 2, invalid) < min_seconds:
+        size *= 2
+    points = []
+    gc.disable()
+    try:
+        for _ in range(DOUBLINGS + 1):
+            points.append((math.log(size), math.log(timed(func, make_input(size), repeat, invalid))))
+            size *= 2
+    finally:
+        gc.enable()
+    # least-squares slope
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return covariance / variance
+
+
+def text_node(text):
+    return [TextNode(text, TextType.TEXT)]
+
+
+def nested(depth):
+    node = LeafNode("b", "x")
+    for _ in range(depth):
+        node = ParentNode("span", [node])
+    return node
+
+
+class ScalingTestCase(unittest.TestCase):
+    def assertScales(self, func, make_input, min_seconds=MIN_SECONDS, invalid=False):
+        exponent = growth_exponent(func, make_input, min_seconds=min_seconds, invalid=invalid)
+        if exponent > MAX_EXPONENT:
+            # measure again before failing, in case the machine was busy
+            exponent = min(exponent, growth_exponent(func, make_input, min_seconds=min_seconds, invalid=invalid))
+        self.assertLessEqual(exponent, MAX_EXPONENT, f"grows like n^{exponent:.2f}")
+
+
+class TestInlineScaling(ScalingTestCase):
+    def test_open_brackets(self):
+        self.assertScales(text_to_text_nodes, lambda n: "[" * n)
+
+    def test_unclosed_links(self):
+        self.assertScales(text_to_text_nodes, lambda n: "[a](" * n)
+
+    def test_unclosed_link_urls(self):
+        self.assertScales(text_to_text_nodes, lambda n: "[a](b" * n)
+
+    def test_unclosed_images(self):
+        self.assertScales(text_to_text_nodes, lambda n: "![" * n)
+        self.assertScales(text_to_text_nodes, lambda n: "![a](" * n)
+
+    def test_nested_parens_in_urls(self):
+        self.assertScales(text_to_text_nodes, lambda n: "[a](" + "(b" * n)
+
+    def test_many_links(self):
+        self.assertScales(text_to_text_nodes, lambda n: "see [l](/u) and ![i](/i.png) " * n)
+
+    def test_unbalanced_delimiters(self):
+        # each is only found to be unbalanced at its last delimiter; spans of
+        # a lower rank are literal inside the unclosed "_"
+        self.assertScales(text_to_text_nodes, lambda n: "**a" * (2 * n + 1), invalid=True)
+        self.assertScales(text_to_text_nodes, lambda n: "_" + "a`b`" * n, invalid=True)
+        self.assertScales(text_to_text_nodes, lambda n: "`" * (2 * n + 1), invalid=True)
+
+    def test_long_line(self):
+        self.assertScales(text_to_text_nodes, lambda n: "word **bold** _it_ `code` " * n)
+
+    def test_split_functions(self):
+        self.assertScales(lambda text: split_nodes_link(text_node(text)), lambda n: "[a](" * n)
+        self.assertScales(lambda text: split_nodes_image(text_node(text)), lambda n: "![a](" * n)
+        self.assertScales(lambda text: split_nodes_delimiter(text_node(text), "**", TextType.BOLD), lambda n: "**a" * (2 * n))
+
+    def test_extract_functions(self):
+        self.assertScales(extract_markdown_links, lambda n: "[" * n)
+        self.assertScales(extract_markdown_images, lambda n: "![a](" * n)
+
+
+class TestBlockScaling(ScalingTestCase):
+    def render(self, markdown):
+        return markdown_to_html_node(markdown).to_html()
+
+    def test_blank_lines(self):
+        self.assertScales(markdown_to_blocks, lambda n: "\n" * n)
+        self.assertScales(markdown_to_blocks, lambda n: " \n" * n)
+
+    def test_fence_toggling(self):
+        self.assertScales(markdown_to_blocks, lambda n: "```\n\n" * n)
+
+    def test_huge_lists(self):
+        self.assertScales(self.render, lambda n: "- item **b**\n" * n)
+        self.assertScales(self.render, lambda n: "".join(f"{i}. item\n" for i in range(1, n + 1)))
+
+    def test_long_paragraph(self):
+        self.assertScales(self.render, lambda n: "a line of [text](/t)\n" * n)
+
+    def test_many_blocks(self):
+        self.assertScales(self.render, lambda n: "# h\n\n> q\n\npara\n\n" * n)
+
+    def test_huge_code_block(self):
+        self.assertScales(self.render, lambda n: "```\n" + "x = [1]\n" * n + "```")
+
+
+class TestNodeScaling(ScalingTestCase):
+    def test_deep_nesting(self):
+        self.assertScales(lambda node: node.to_html(), nested)
+
+    def test_wide_tree(self):
+        self.assertScales(lambda node: node.to_html(), lambda n: ParentNode("ul", [ParentNode("li", [LeafNode(None, "x")])] * n))
+
+
+class TestOtherScaling(ScalingTestCase):
+    def test_template(self):
+        self.assertScales(Template, lambda n: "{{" * n)
+        self.assertScales(Template, lambda n: "{{ a" * n)
+        self.assertScales(Template, lambda n: "<p>{{ Title }}</p>" * n)
+
+    def test_highlighting(self):
+        self.assertScales(lambda code: builtin_highlight(code, "javascript"), lambda n: "/* " * n)
+        self.assertScales(lambda code: builtin_highlight(code, "javascript"), lambda n: "` " * n)
+        self.assertScales(lambda code: builtin_highlight(code, "python"), lambda n: "''' \"\"\" " * n)
+        self.assertScales(lambda code: builtin_highlight(code, "css"), lambda n: "a: " * n)
+        self.assertScales(lambda code: builtin_highlight(code, "html"), lambda n: "<!-- " * n)
+
+    def test_unclosed_string_lexing(self):
+        # This input lexes to one token as long as the input. Past a few
+        # hundred KB the regex engine's own bookkeeping for that one match
+        # falls out of cache, which looks super-linear, so only the lexer is
+        # timed, on smaller inputs.
+        pattern, _ = lexer("python")
+        self.assertScales(lambda code: list(pattern.finditer(code)), lambda n: '"\\' * n, min_seconds=0.0002)
+
+    def test_link_extraction(self):
+        self.assertScales(extract_links, lambda n: "[a](" * n)
+        self.assertScales(extract_links, lambda n: "`[" * n)
+
+    def test_search_text(self):
+        self.assertScales(lambda markdown: tokenize(page_text(markdown)), lambda n: "word [l](/u) **b**\n" * n)
+
+
+if __name__ == "__main__":
+    unittest.main()
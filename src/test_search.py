@@ -0,0 +1,83 @@
+import json
+import os
+import unittest
+from fixtures import TempDirTestCase, quiet
+from search import SearchIndex, build_search_index, page_text, shard_name, tokenize
+
+
+class TestText(unittest.TestCase):
+    def test_page_text(self):
+        markdown = "# The **Title**\n\nSome _text_ with a [link](/x) and ![alt](/y.png).\n\n```\ncode()\n```\n\n- one\n- `two`"
+        self.assertEqual(page_text(markdown).split(), "The Title Some text with a link and alt . one two".split())
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Hobbit's ring, and Frodo_Baggins in 2024!"), ["hobbit", "ring", "frodo", "baggins", "2024"])
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("é"), "é")
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.root = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public")
+        self.index_path = os.path.join(self.tmp.name, "search-index.json")
+        self.write("index.md", "# Home\n\nHobbits live in holes.")
+        self.write("blog/post.md", "# Post\n\nHobbits eat second breakfast.")
+
+    def build(self):
+        index = SearchIndex(self.index_path)
+        with quiet():
+            written = build_search_index(self.content, self.dest, index)
+        return index, written
+
+    def read_shard(self, name):
+        with open(os.path.join(self.dest, "search", name)) as f:
+            return json.load(f)
+
+    def test_builds_docs_and_shards(self):
+        index, written = self.build()
+        self.assertEqual(index.scans, 2)
+        self.assertEqual(self.read_shard("docs.json"), [["/blog/post.html", "Post"], ["/index.html", "Home"]])
+        self.assertEqual(self.read_shard("ho.json"), {"hobbits": [[0, 1], [1, 1]], "holes": [[1, 1]], "home": [[1, 1]]})
+        self.assertEqual(written, len(os.listdir(os.path.join(self.dest, "search"))) - 1)
+
+    def test_unchanged_pages_are_not_rescanned(self):
+        self.build()
+        index, written = self.build()
+        self.assertEqual((index.scans, written), (0, 0))
+
+    def test_changed_page_rewrites_only_its_shards(self):
+        self.build()
+        before = os.stat(os.path.join(self.dest, "search", "ho.json")).st_mtime_ns
+        self.write("blog/post.md", "# Post\n\nHobbits eat elevenses.")
+        index, written = self.build()
+        self.assertEqual(index.scans, 1)
+        # "second" and "breakfast" leave, "elevenses" arrives
+        self.assertEqual(written, 1)
+        self.assertEqual(self.read_shard("el.json"), {"elevenses": [[0, 1]]})
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search", "se.json")))
+        self.assertEqual(os.stat(os.path.join(self.dest, "search", "ho.json")).st_mtime_ns, before)
+
+    def test_deleted_page_frees_its_id(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertEqual(self.read_shard("docs.json"), [None, ["/index.html", "Home"]])
+        self.assertEqual(self.read_shard("ho.json")["hobbits"], [[1, 1]])
+        self.write("new.md", "# New\n\nHobbits again.")
+        self.build()
+        self.assertEqual(self.read_shard("docs.json"), [["/new.html", "New"], ["/index.html", "Home"]])
+
+    def test_missing_output_is_rewritten(self):
+        self.build()
+        os.rename(self.dest, self.dest + ".old")
+        _, written = self.build()
+        self.assertGreater(written, 0)
+        self.assertEqual(len(self.read_shard("docs.json")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import http.client
+import json
+import os
+import socket
+import threading
+import unittest
+from fixtures import TempDirTestCase
+from highlight import get_highlighter, set_highlighter
+from serve import LatencyStats, Renderer, make_server
+from textnode import set_image_attributes
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class TestLatencyStats(unittest.TestCase):
+    def test_percentiles(self):
+        stats = LatencyStats()
+        self.assertIsNone(stats.summary()["p50_ms"])
+        for ms in range(1, 101):
+            stats.record(ms / 1000)
+        stats.record(0.5, error=True)
+        summary = stats.summary()
+        self.assertEqual(summary["requests"], 101)
+        self.assertEqual(summary["errors"], 1)
+        self.assertAlmostEqual(summary["p50_ms"], 51)
+        self.assertAlmostEqual(summary["p99_ms"], 100)
+
+    def test_keeps_recent_samples(self):
+        stats = LatencyStats(max_samples=2)
+        for seconds in (1, 0.001, 0.001):
+            stats.record(seconds)
+        self.assertAlmostEqual(stats.percentile(1.0), 1)
+        self.assertEqual(stats.requests, 3)
+
+
+class TestRenderServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(set_highlighter, get_highlighter())
+        self.addCleanup(set_image_attributes, None)
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.renderer = Renderer(self.template_path, highlight_theme=None)
+
+    def start(self, **kwargs):
+        server = make_server(self.renderer, **kwargs)
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def request(self, connection, method, path, body=None):
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, response.read().decode()
+
+    def test_render_over_http(self):
+        server = self.start(port=0)
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        self.addCleanup(connection.close)
+        status, html = self.request(connection, "POST", "/render", "# Hi\n\nSome **bold**")
+        self.assertEqual(status, 200)
+        self.assertEqual(html, "<title>Hi</title><div><h1>Hi</h1><p>Some <b>bold</b></p></div>")
+        # same connection, and the block is already cached
+        status, html = self.request(connection, "POST", "/render?fragment=1", "Some **bold**")
+        self.assertEqual(html, "<div><p>Some <b>bold</b></p></div>")
+        self.assertEqual(self.renderer.block_cache.hits, 1)
+
+        status, body = self.request(connection, "POST", "/render", "an **unclosed bold")
+        self.assertEqual(status, 400)
+        status, body = self.request(connection, "GET", "/stats")
+        stats = json.loads(body)
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["errors"], 1)
+        self.assertGreater(stats["p99_ms"], 0)
+        self.assertEqual(stats["block_cache"]["hits"], 1)
+
+    def test_bad_requests_get_errors(self):
+        server = self.start(port=0)
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        self.addCleanup(connection.close)
+        status, body = self.request(connection, "POST", "/render", b"\xff\xfe not utf-8")
+        self.assertEqual(status, 400)
+        self.assertIn("utf-8", body)
+        # the connection is still usable
+        self.assertEqual(self.request(connection, "POST", "/render?fragment=1", "ok")[0], 200)
+        for length in ("-5", "lots"):
+            connection.putrequest("POST", "/render")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual(response.status, 400)
+            response.read()
+            connection.close()
+
+    def test_render_over_unix_socket(self):
+        path = os.path.join(self.tmp.name, "render.sock")
+        self.start(socket_path=path)
+        connection = UnixHTTPConnection(path)
+        self.addCleanup(connection.close)
+        status, html = self.request(connection, "POST", "/render?fragment=1", "no title")
+        self.assertEqual((status, html), (200, "<div><p>no title</p></div>"))
+
+    def test_unix_socket_path_is_only_replaced_if_a_socket(self):
+        path = os.path.join(self.tmp.name, "render.sock")
+        with open(path, "w") as f:
+            f.write("precious")
+        with self.assertRaises(FileExistsError):
+            make_server(self.renderer, socket_path=path)
+        with open(path) as f:
+            self.assertEqual(f.read(), "precious")
+        os.remove(path)
+        # a stale socket from an earlier run is replaced
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = make_server(self.renderer, socket_path=path)
+        server.server_close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_template_changes_are_picked_up(self):
+        self.assertEqual(self.renderer.render("# A"), "<title>A</title><div><h1>A</h1></div>")
+        with open(self.template_path, "w") as f:
+            f.write("<main>{{ Content }}</main>")
+        os.utime(self.template_path, ns=(0, 0))
+        self.assertEqual(self.renderer.render("# A"), "<main><div><h1>A</h1></div></main>")
+
+    def test_concurrent_requests(self):
+        server = self.start(port=0)
+        errors = []
+
+        def client(n):
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            try:
+                for i in range(20):
+                    status, html = self.request(connection, "POST", "/render?fragment=1", f"page {n} line {i}")
+                    if html != f"<div><p>page {n} line {i}</p></div>":
+                        errors.append(html)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.renderer.stats.requests, 80)
+
+
+if __name__ == "__main__":
+    unittest.main()
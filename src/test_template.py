@@ -0,0 +1,87 @@
+import io
+import os
+import unittest
+from fixtures import TempDirTestCase
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = Template("<title>{{ Title }}</title>{{Content}}")
+        self.assertEqual(
+            template.segments,
+            [("<title>", None), ("{{ Title }}", "Title"), ("</title>", None), ("{{Content}}", "Content")],
+        )
+        self.assertEqual(template.slots, {"Title", "Content"})
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}<p>{{ Title }}</p>")
+        html = template.render({"Title": "Hi", "Content": "<b>x</b>"})
+        self.assertEqual(html, "<h1>Hi</h1><b>x</b><p>Hi</p>")
+
+    def test_missing_value_keeps_placeholder(self):
+        self.assertEqual(Template("a {{ Other }} b").render({}), "a {{ Other }} b")
+
+    def test_write_streams_nodes(self):
+        template = Template("<main>{{ Content }}</main><i>{{ Title }}</i>")
+        node = ParentNode("div", [LeafNode("b", "bold")])
+        sink = io.StringIO()
+        template.write(sink, {"Title": "T", "Content": node})
+        self.assertEqual(sink.getvalue(), "<main><div><b>bold</b></div></main><i>T</i>")
+
+    def test_include_in_a_string_template(self):
+        with self.assertRaises(ValueError):
+            Template("{{> nav.html }}")
+
+
+class TestLoadTemplate(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def write(self, rel_path, content, mtime=None):
+        path = super().write(rel_path, content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_includes_are_expanded(self):
+        path = self.write("template.html", "{{> partials/head.html }}<body>{{ Content }}</body>")
+        head = self.write("partials/head.html", "<title>{{ Title }}</title>{{> meta.html }}")
+        meta = self.write("partials/meta.html", "<meta>")
+        template = load_template(path)
+        self.assertEqual(template.source, "<title>{{ Title }}</title><meta><body>{{ Content }}</body>")
+        self.assertEqual(template.files, (path, head, meta))
+        self.assertEqual(template.render({"Title": "T", "Content": "C"}), "<title>T</title><meta><body>C</body>")
+
+    def test_cached_until_a_file_changes(self):
+        path = self.write("template.html", "{{> nav.html }}{{ Content }}", mtime=1000)
+        self.write("nav.html", "<nav>", mtime=1000)
+        template = load_template(path)
+        self.assertIs(load_template(path), template)
+        self.write("nav.html", "<nav>", mtime=2000)
+        reloaded = load_template(path)
+        self.assertIsNot(reloaded, template)
+        self.assertIs(load_template(path), reloaded)
+
+    def test_partial_change_is_picked_up(self):
+        path = self.write("template.html", "{{> nav.html }}{{ Content }}")
+        self.write("nav.html", "<nav>")
+        load_template(path)
+        self.write("nav.html", "<header>")
+        self.assertEqual(load_template(path).source, "<header>{{ Content }}")
+
+    def test_include_cycle(self):
+        path = self.write("a.html", "{{> b.html }}")
+        self.write("b.html", "{{> a.html }}")
+        with self.assertRaises(ValueError):
+            load_template(path)
+
+    def test_missing_include(self):
+        path = self.write("template.html", "{{> missing.html }}")
+        with self.assertRaises(FileNotFoundError):
+            load_template(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
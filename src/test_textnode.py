@@ -1,9 +1,16 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from htmlnode import LeafNode
+from textnode import TextNode, TextType, image_node, link_node, set_asset_urls, set_image_attributes, text_node_to_html_node
 
 
 class TestTextNode(unittest.TestCase):
+    def setUp(self):
+        # links and images are shared through module-wide caches, which other
+        # tests may have filled
+        link_node.cache_clear()
+        image_node.cache_clear()
+
     def test_eq(self):
         node = TextNode("This is a text node", TextType.BOLD)
         node2 = TextNode("This is a text node", TextType.BOLD)
@@ -50,5 +57,51 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.value, "")
         self.assertEqual(html_node.props, {"src": "img.png", "alt": "alt text"})
 
+    def test_repeated_link_is_shared(self):
+        first = text_node_to_html_node(TextNode("Home", TextType.LINK, "/index.html"))
+        second = text_node_to_html_node(TextNode("Home", TextType.LINK, "/index.html"))
+        self.assertIs(first, second)
+        other = text_node_to_html_node(TextNode("Home", TextType.LINK, "/about.html"))
+        self.assertIsNot(first, other)
+        # shared, so they can't be changed and serialize once
+        with self.assertRaises(AttributeError):
+            first.value = "Away"
+        html = first.to_html()
+        self.assertIs(second.to_html(), html)
+        self.assertEqual(first.hits, 1)
+
+    def test_shared_leaves_are_leaf_nodes(self):
+        for node in (TextNode("Home", TextType.LINK, "/"), TextNode("logo", TextType.IMAGE, "/logo.png")):
+            self.assertIsInstance(text_node_to_html_node(node), LeafNode)
+
+    def test_asset_urls_rewrite_links_and_images(self):
+        set_asset_urls({"/images/a.png": "/images/a.1234abcd.png"})
+        self.addCleanup(set_asset_urls, None)
+        image = text_node_to_html_node(TextNode("a", TextType.IMAGE, "/images/a.png"))
+        self.assertEqual(image.props["src"], "/images/a.1234abcd.png")
+        link = text_node_to_html_node(TextNode("a", TextType.LINK, "/images/a.png"))
+        self.assertEqual(link.props["href"], "/images/a.1234abcd.png")
+        other = text_node_to_html_node(TextNode("b", TextType.IMAGE, "/images/b.png"))
+        self.assertEqual(other.props["src"], "/images/b.png")
+
+    def test_image_attributes(self):
+        set_image_attributes({"/images/a.png": (640, 480)}, eager=["/images/hero-*"])
+        self.addCleanup(set_image_attributes, None)
+        image = text_node_to_html_node(TextNode("a", TextType.IMAGE, "/images/a.png"))
+        self.assertEqual(
+            image.to_html(),
+            '<img src="/images/a.png" alt="a" width="640" height="480" loading="lazy" decoding="async"></img>',
+        )
+        remote = text_node_to_html_node(TextNode("r", TextType.IMAGE, "https://example.com/r.png"))
+        self.assertEqual(remote.props["loading"], "lazy")
+        self.assertNotIn("width", remote.props)
+        hero = text_node_to_html_node(TextNode("h", TextType.IMAGE, "/images/hero-1.png"))
+        self.assertNotIn("loading", hero.props)
+
+    def test_slots(self):
+        node = TextNode("Hello", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertFalse(hasattr(text_node_to_html_node(node), "__dict__"))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,144 @@
+import json
+import os
+import time
+import unittest
+from fixtures import TempDirTestCase
+from watch import DependencyGraph, InotifyWatcher, PollingWatcher, Site, watch_site
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_affected(self):
+        graph = DependencyGraph()
+        graph.add("public/a.html", "content/a.md", "template.html")
+        graph.add("public/b.html", "content/b.md", "template.html")
+        self.assertEqual(graph.affected(["content/a.md"]), {"public/a.html"})
+        self.assertEqual(graph.affected(["template.html"]), {"public/a.html", "public/b.html"})
+        graph.remove("public/a.html")
+        self.assertEqual(graph.affected(["template.html"]), {"public/b.html"})
+
+
+class TestSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<html>{{ Content }}</html>")
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/blog/post.md", "# Post\n\nWorld")
+        self.site = Site(*(self.path(name) for name in ("static", "content", "template.html", "public")), search_index_path=None)
+        self.site.rebuild(self.site.graph.dependents.keys())
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def test_initial_rebuild(self):
+        self.assertEqual(self.read("public/index.css"), "body {}")
+        self.assertEqual(self.read("public/blog/post.html"), "<html><div><h1>Post</h1><p>World</p></div></html>")
+
+    def test_page_change_rebuilds_only_that_page(self):
+        changed = self.write("content/index.md", "# Home\n\nChanged")
+        outputs = self.site.rebuild([changed])
+        self.assertEqual(outputs, {self.path("public/index.html")})
+        self.assertIn("Changed", self.read("public/index.html"))
+
+    def test_template_change_rebuilds_all_pages(self):
+        changed = self.write("template.html", "<main>{{ Content }}</main>")
+        outputs = self.site.rebuild([changed])
+        self.assertEqual(outputs, {self.path("public/index.html"), self.path("public/blog/post.html")})
+        self.assertTrue(self.read("public/blog/post.html").startswith("<main>"))
+
+    def test_partial_change_rebuilds_all_pages(self):
+        self.write("partials/nav.html", "<nav>{{ Title }}</nav>")
+        self.site.rebuild([self.write("template.html", "{{> partials/nav.html }}{{ Content }}")])
+        outputs = self.site.rebuild([self.write("partials/nav.html", "<header>{{ Title }}</header>")])
+        self.assertEqual(outputs, {self.path("public/index.html"), self.path("public/blog/post.html")})
+        self.assertTrue(self.read("public/index.html").startswith("<header>Home</header>"))
+
+    def test_watcher_follows_partials_added_to_the_template(self):
+        watchers = [watch_site(self.site, interval=0.05)]
+        self.addCleanup(lambda: watchers[-1].close())
+        partial = self.write("partials/nav.html", "<nav>{{ Title }}</nav>")
+        template = self.write("template.html", "{{> partials/nav.html }}{{ Content }}")
+        self.assertIn(template, watchers[-1].wait(timeout=2))
+        self.site.rebuild([template])
+        watchers.append(watch_site(self.site, watchers[-1]))
+        self.assertIsNot(watchers[-1], watchers[0])
+        self.assertIs(watch_site(self.site, watchers[-1]), watchers[-1])
+        time.sleep(0.01)
+        self.write("partials/nav.html", "<header>{{ Title }}</header>")
+        self.assertEqual(watchers[-1].wait(timeout=2), {partial})
+
+    def test_new_and_deleted_files(self):
+        self.site.rebuild([self.write("static/images/new.png", "png")])
+        self.assertEqual(self.read("public/images/new.png"), "png")
+        os.remove(self.path("content/blog/post.md"))
+        outputs = self.site.rebuild([self.path("content/blog/post.md")])
+        self.assertEqual(outputs, {self.path("public/blog/post.html")})
+        self.assertFalse(os.path.exists(self.path("public/blog")))
+
+    def test_check_links_follows_changes(self):
+        self.assertEqual(self.site.check_links(), [])
+        self.site.rebuild([self.write("content/index.md", "# Home\n\n[Post](/blog/post.html)")])
+        self.assertEqual(self.site.check_links(), [])
+        os.remove(self.path("content/blog/post.md"))
+        self.site.rebuild([self.path("content/blog/post.md")])
+        self.assertEqual(self.site.check_links(), [(self.path("content/index.md"), 3, "link", "/blog/post.html")])
+
+    def test_update_search(self):
+        self.site.update_search()
+        self.site.rebuild([self.write("content/blog/post.md", "# Post\n\nGalaxy")])
+        self.assertEqual(self.site.update_search(), 1)
+        with open(self.path("public/search/ga.json")) as f:
+            self.assertEqual(json.load(f), {"galaxy": [[0, 1]]})
+        self.assertFalse(os.path.exists(self.path("public/search/wo.json")))
+
+    def test_rebuilt_outputs_lose_compressed_sidecars(self):
+        self.write("public/index.html.gz", "old")
+        self.write("public/index.css.br", "old")
+        self.write("public/blog/post.html.gz", "old")
+        self.site.rebuild([self.write("content/index.md", "# Home\n\nChanged")])
+        self.site.rebuild([self.write("static/index.css", "main {}")])
+        self.assertFalse(os.path.exists(self.path("public/index.html.gz")))
+        self.assertFalse(os.path.exists(self.path("public/index.css.br")))
+        self.assertTrue(os.path.exists(self.path("public/blog/post.html.gz")))
+
+    def test_unrelated_change_does_nothing(self):
+        self.assertEqual(self.site.rebuild([self.write("content/notes.txt", "hi")]), set())
+
+
+class TestWatchers(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = os.path.join(self.tmp.name, "content")
+        os.makedirs(self.dir)
+        self.file = os.path.join(self.tmp.name, "template.html")
+        with open(self.file, "w") as f:
+            f.write("old")
+
+    def check_watcher(self, watcher):
+        self.addCleanup(watcher.close)
+        path = os.path.join(self.dir, "sub", "page.md")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write("# Page")
+        self.assertIn(path, watcher.wait(timeout=2))
+
+        with open(os.path.join(self.tmp.name, "unrelated.txt"), "w") as f:
+            f.write("ignored")
+        time.sleep(0.01)
+        with open(self.file, "w") as f:
+            f.write("new template")
+        self.assertEqual(watcher.wait(timeout=2), {self.file})
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.dir], [self.file], interval=0.05))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.dir], [self.file])
+        except (OSError, AttributeError):
+            self.skipTest("inotify not available")
+        self.check_watcher(watcher)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
 from enum import Enum
+from fnmatch import fnmatch
+from functools import lru_cache
 from htmlnode import LeafNode
 
 
@@ -12,6 +14,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -39,8 +43,56 @@ def text_node_to_html_node(text_node):
     elif text_node.text_type == TextType.CODE:
         return LeafNode("code", text_node.text)
     elif text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return link_node(text_node.text, text_node.url)
     elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        return image_node(text_node.text, text_node.url)
     else:
         raise Exception(f"Unknown TextType: {text_node.text_type}")
+
+# Root-relative asset URL -> fingerprinted URL, see set_asset_urls
+_asset_urls = {}
+# Root-relative image URL -> (width, height); None leaves <img> bare
+_image_sizes = None
+# fnmatch patterns for image URLs that shouldn't be lazy-loaded
+_eager_images = ()
+
+def set_asset_urls(urls):
+    global _asset_urls
+    _asset_urls = urls or {}
+    # cached nodes may hold the old URLs
+    link_node.cache_clear()
+    image_node.cache_clear()
+
+def set_image_attributes(sizes, eager=()):
+    global _image_sizes, _eager_images
+    _image_sizes = sizes
+    _eager_images = tuple(eager)
+    image_node.cache_clear()
+
+def url_attributes(url):
+    # what link_node and image_node take from the settings above for url,
+    # so a page's cache key can cover just the URLs it uses
+    if _image_sizes is None:
+        return _asset_urls.get(url), None, None
+    eager = any(fnmatch(url, pattern) for pattern in _eager_images)
+    return _asset_urls.get(url), _image_sizes.get(url), eager
+
+# The same link or image shows up on many pages, so they share one frozen
+# leaf, which also serializes only once (see htmlnode.FrozenNode)
+@lru_cache(maxsize=4096)
+def link_node(text, url):
+    return LeafNode("a", text, {"href": _asset_urls.get(url, url)}).freeze()
+
+@lru_cache(maxsize=4096)
+def image_node(alt, url):
+    props = {"src": _asset_urls.get(url, url), "alt": alt}
+    if _image_sizes is not None:
+        # sizes let the browser reserve space before the image arrives
+        size = _image_sizes.get(url)
+        if size:
+            props["width"] = str(size[0])
+            props["height"] = str(size[1])
+        if not any(fnmatch(url, pattern) for pattern in _eager_images):
+            props["loading"] = "lazy"
+        props["decoding"] = "async"
+    return LeafNode("img", "", props).freeze()
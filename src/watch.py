@@ -0,0 +1,307 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from collections import defaultdict
+from block_markdown import BlockCache
+from compress import EXTENSIONS as COMPRESSED_EXTENSIONS, remove_sidecars
+from copystatic import copy_file, prune_empty_dirs, walk_files
+from gencontent import find_markdown_files, generate_page, output_path
+from linkcheck import LinkIndex, broken_links, report_broken
+from search import INDEX_PATH as SEARCH_INDEX_PATH, SearchIndex
+from template import load_template
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+# editors save in bursts (write, chmod, rename), so collect events this long
+DEBOUNCE_SECONDS = 0.02
+
+class InotifyWatcher:
+    # Watches `dirs` recursively and each of `files` through a watch on its
+    # parent directory that ignores everything else in it
+    def __init__(self, dirs, files=()):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self.files = {os.path.abspath(path) for path in files}
+        self._filtered = set()
+        for root in dirs:
+            self._add_tree(root)
+        for path in self.files:
+            parent = os.path.dirname(path)
+            if parent not in self._dirs.values():
+                self._filtered.add(self._add_dir(parent))
+
+    def _add_dir(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+        self._dirs[wd] = path
+        return wd
+
+    def _add_tree(self, root):
+        # returns the files already inside, so a new directory's contents
+        # count as changes too
+        files = []
+        for dir_path, _, file_names in os.walk(root):
+            self._add_dir(dir_path)
+            files.extend(os.path.join(dir_path, name) for name in file_names)
+        return files
+
+    def wait(self, timeout=None):
+        # Block until something changes and return the set of changed paths
+        # (empty on timeout)
+        changed = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        while ready:
+            changed.update(self._read_events())
+            ready, _, _ = select.select([self._fd], [], [], DEBOUNCE_SECONDS)
+        return changed
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            dir_path = self._dirs.get(wd)
+            if dir_path is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            if not name:
+                continue
+            path = os.path.join(dir_path, name)
+            if wd in self._filtered:
+                if path in self.files:
+                    paths.append(path)
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                    paths.extend(self._add_tree(path))
+            else:
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+class PollingWatcher:
+    def __init__(self, dirs, files=(), interval=0.2):
+        self.dirs = dirs
+        self.files = {os.path.abspath(path) for path in files}
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root in self.dirs:
+            if os.path.isdir(root):
+                for rel_path, st in walk_files(root):
+                    snapshot[os.path.join(root, rel_path)] = (st.st_mtime_ns, st.st_size)
+        for path in self.files:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys() if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+def make_watcher(dirs, files=(), poll=False, interval=0.2):
+    if not poll:
+        try:
+            return InotifyWatcher(dirs, files)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(dirs, files, interval)
+
+class DependencyGraph:
+    # Each output has one primary source it is built from, plus any number of
+    # other inputs (the template, for pages). A change to any of them makes
+    # the output stale.
+    def __init__(self):
+        self.sources = {}
+        self.dependents = defaultdict(set)
+
+    def add(self, output, source, *inputs):
+        self.sources[output] = source
+        for path in (source,) + inputs:
+            self.dependents[path].add(output)
+
+    def remove(self, output):
+        self.sources.pop(output, None)
+        for outputs in self.dependents.values():
+            outputs.discard(output)
+
+    def affected(self, paths):
+        outputs = set()
+        for path in paths:
+            outputs.update(self.dependents.get(path, ()))
+        return outputs
+
+class Site:
+    def __init__(self, static_dir="static", content_dir="content", template_path="template.html", dest_dir="public", search_index_path=SEARCH_INDEX_PATH):
+        self.static_dir = os.path.abspath(static_dir)
+        self.content_dir = os.path.abspath(content_dir)
+        self.template_path = os.path.abspath(template_path)
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.graph = DependencyGraph()
+        self.block_cache = BlockCache()
+        self.link_index = LinkIndex(path=None)
+        # shares the build's index, which matches what's in dest_dir
+        self.search_index = SearchIndex(search_index_path)
+        self.template = None
+        self.load_template()
+        for rel_path, _ in walk_files(self.static_dir):
+            self.add_static(os.path.join(self.static_dir, rel_path))
+        for rel_path in find_markdown_files(self.content_dir):
+            self.add_page(os.path.join(self.content_dir, rel_path))
+
+    def load_template(self):
+        # pages depend on the template and every partial it includes
+        self.template = load_template(self.template_path)
+        for output, source in self.graph.sources.items():
+            if source.startswith(self.content_dir + os.sep):
+                self.graph.add(output, source, *self.template.files)
+
+    def add_static(self, source):
+        output = os.path.join(self.dest_dir, os.path.relpath(source, self.static_dir))
+        self.graph.add(output, source)
+        return output
+
+    def add_page(self, source):
+        rel_path = os.path.relpath(source, self.content_dir)
+        output = os.path.join(self.dest_dir, output_path(rel_path))
+        self.graph.add(output, source, *self.template.files)
+        return output
+
+
+    def rebuild(self, changed):
+        # Rebuilds only the outputs that depend on the changed paths; returns
+        # the outputs that were written or deleted
+        changed = {os.path.abspath(path) for path in changed}
+        if changed.intersection(self.template.files):
+            self.load_template()
+        outputs = self.graph.affected(changed)
+        for path in changed:
+            if path.endswith(".md") and path.startswith(self.content_dir + os.sep):
+                outputs.add(self.add_page(path))
+            elif path.startswith(self.static_dir + os.sep):
+                outputs.add(self.add_static(path))
+
+        for output in sorted(outputs):
+            source = self.graph.sources[output]
+            if output.endswith(COMPRESSED_EXTENSIONS):
+                # left by a --compress build, they'd keep serving the old
+                # content; the next --compress build writes them again
+                remove_sidecars(output)
+            if not os.path.exists(source):
+                self.graph.remove(output)
+                if os.path.isfile(output):
+                    os.remove(output)
+                    prune_empty_dirs(os.path.dirname(output), self.dest_dir)
+                continue
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            if source.startswith(self.static_dir + os.sep):
+                copy_file(source, output)
+            else:
+                generate_page(source, self.template, output, block_cache=self.block_cache)
+        return outputs
+
+    def pages(self):
+        # [(markdown path, page URL)] for every page
+        pages = []
+        for output, source in self.graph.sources.items():
+            if source.startswith(self.content_dir + os.sep):
+                pages.append((source, self.url(output)))
+        return sorted(pages)
+
+    def url(self, output):
+        return "/" + os.path.relpath(output, self.dest_dir).replace(os.sep, "/")
+
+    def check_links(self):
+        # Only pages that changed since the last check are rescanned; the
+        # lookups themselves are cheap enough to redo for every page, which
+        # also catches links broken by a deleted page or static file
+        pages = self.pages()
+        targets = {self.url(output) for output in self.graph.sources}
+        self.link_index.prune(source for source, _ in pages)
+        return broken_links(pages, targets, self.link_index)
+
+    def update_search(self):
+        written = self.search_index.update(self.pages(), self.dest_dir)
+        self.search_index.save()
+        return written
+
+def watch_site(site, watcher=None, poll=False, interval=0.2):
+    # A watcher for the site's sources and the template's current files.
+    # `watcher` is kept if it already covers them; otherwise (a partial was
+    # added to the template, say, whose directory may not be watched at all)
+    # it's closed and replaced.
+    files = {os.path.abspath(path) for path in site.template.files}
+    if watcher is not None:
+        if watcher.files == files:
+            return watcher
+        watcher.close()
+    return make_watcher([site.static_dir, site.content_dir], files, poll, interval)
+
+def watch(site, poll=False, interval=0.2):
+    watcher = watch_site(site, poll=poll, interval=interval)
+    print(f"Watching for changes ({type(watcher).__name__}), press Ctrl-C to stop")
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            try:
+                outputs = site.rebuild(changed)
+            except Exception as e:
+                print(f"Rebuild failed: {e}")
+                outputs = None
+            watcher = watch_site(site, watcher, poll, interval)
+            if outputs:
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"Rebuilt {len(outputs)} outputs in {elapsed:.1f} ms")
+                site.update_search()
+                report_broken(site.check_links())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()